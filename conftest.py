@@ -0,0 +1,2 @@
+# Fixtures of the project for every test path, e.g. only yatube/posts/tests.
+pytest_plugins = ['core.testing']
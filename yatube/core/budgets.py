@@ -0,0 +1,106 @@
+import logging
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+TRANSACTION_STATEMENTS = ('BEGIN', 'SAVEPOINT', 'RELEASE', 'ROLLBACK')
+
+
+class QueryBudget:
+    """Number of queries and repeated queries a view may run."""
+
+    def __init__(self, queries, duplicates=0):
+        self.queries = queries
+        self.duplicates = duplicates
+
+    def __repr__(self):
+        return f'QueryBudget({self.queries}, {self.duplicates})'
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def query_budget(queries, duplicates=0):
+    """Declare the query budget of a view."""
+    def decorator(view):
+        view.query_budget = QueryBudget(queries, duplicates)
+        return view
+    return decorator
+
+
+class QueryLog:
+    """Collect data queries run on all database connections."""
+
+    def __init__(self):
+        self.statements = []
+        self.databases = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(TRANSACTION_STATEMENTS) and not any(
+            table in sql for table in settings.QUERY_BUDGET_IGNORED_TABLES
+        ):
+            self.statements.append(sql)
+            self.databases.append(context['connection'].alias)
+        return execute(sql, params, many, context)
+
+    @property
+    def duplicates(self):
+        """Number of queries that repeat an earlier one with new params.
+
+        A query run once on each shard of posts is not a repeat.
+        """
+        queries = list(zip(self.databases, self.statements))
+        return len(queries) - len(set(queries))
+
+
+class QueryBudgetMiddleware:
+    """Report views that run more queries than their budget allows."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        log = QueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.get_response(request)
+        budget = getattr(request, 'query_budget', None)
+        if response.streaming:
+            response.streaming_content = self.streamed(
+                request, budget, log, response.streaming_content
+            )
+        elif budget is not None:
+            self.check(request, budget, log)
+        return response
+
+    def streamed(self, request, budget, log, content):
+        """Count the queries run while the body is sent, then check them."""
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            yield from content
+        if budget is not None:
+            self.check(request, budget, log)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = getattr(view_func, 'query_budget', None)
+
+    def check(self, request, budget, log):
+        queries = len(log.statements)
+        if queries <= budget.queries and log.duplicates <= budget.duplicates:
+            return
+        message = (
+            f'{request.path}: {queries} queries, {log.duplicates} '
+            f'duplicates, budget is {budget.queries} queries, '
+            f'{budget.duplicates} duplicates'
+        )
+        if settings.QUERY_BUDGET_STRICT:
+            raise QueryBudgetExceeded(
+                message + '\n' + '\n'.join(log.statements)
+            )
+        logger.warning(message)
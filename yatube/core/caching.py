@@ -0,0 +1,123 @@
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+
+def generation_key(kind, pk=None):
+    """Return the cache key of a generation counter."""
+    if pk is None:
+        return f'generation:{kind}'
+    return f'generation:{kind}:{pk}'
+
+
+def get_generations(keys):
+    """Return the generations, starting the missing ones from scratch.
+
+    A lost generation gets a new unique value instead of a default one,
+    so an evicted generation never brings an old cache entry back.
+    """
+    generations = cache.get_many(keys)
+    missing = {
+        key: time.time_ns() for key in keys if key not in generations
+    }
+    if missing:
+        cache.set_many(missing, None)
+        generations.update(missing)
+    return generations
+
+
+def bump(*keys):
+    """Invalidate every cache entry that depends on the keys."""
+    now = time.time_ns()
+    cache.set_many({key: now for key in keys}, None)
+
+
+def depend_on(request, *keys):
+    """Mark the cached page as depending on the generations.
+
+    Generations are read right away, before the view loads the data,
+    so a write that happens during rendering invalidates the page.
+    """
+    dependencies = getattr(request, 'cache_dependencies', None)
+    if dependencies is not None:
+        dependencies.update(get_generations(keys))
+
+
+def _is_fresh(entry):
+    if entry is None:
+        return False
+    current = cache.get_many(entry['dependencies'].keys())
+    return current == entry['dependencies']
+
+
+def _from_entry(entry):
+    response = HttpResponse(
+        entry['content'],
+        content_type=entry['content_type']
+    )
+    response['X-Page-Cache'] = 'hit'
+    return response
+
+
+def _wait_for(key):
+    """Wait for a concurrent request to store the page."""
+    for _ in range(settings.PAGE_CACHE_LOCK_WAIT):
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if _is_fresh(entry):
+            return entry
+    return None
+
+
+def anonymous_cache_page(view):
+    """Cache pages of anonymous users until their generations change.
+
+    Only one of the concurrent requests that miss the cache renders
+    the page, the others serve the stale copy or wait for the new one.
+    """
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if (request.method != 'GET' or request.user.is_authenticated
+                or not settings.PAGE_CACHE_TIMEOUT):
+            return view(request, *args, **kwargs)
+        key = 'page:' + hashlib.md5(
+            request.get_full_path().encode()
+        ).hexdigest()
+        entry = cache.get(key)
+        if _is_fresh(entry):
+            return _from_entry(entry)
+        lock_key = f'{key}:lock'
+        locked = cache.add(lock_key, 1, settings.PAGE_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            if entry is None:
+                entry = _wait_for(key)
+            if entry is not None:
+                return _from_entry(entry)
+        try:
+            request.cache_dependencies = {}
+            response = view(request, *args, **kwargs)
+            if (response.status_code == 200 and not response.streaming
+                    and request.cache_dependencies):
+                timeout = settings.PAGE_CACHE_TIMEOUT
+                if getattr(request, 'replica', None):
+                    # A replica may miss the writes the generations count,
+                    # the page is kept until the replica catches up.
+                    timeout = min(timeout, settings.REPLICA_MAX_LAG)
+                cache.set(
+                    key,
+                    {
+                        'content': response.content,
+                        'content_type': response['Content-Type'],
+                        'dependencies': request.cache_dependencies,
+                    },
+                    timeout
+                )
+            return response
+        finally:
+            if locked:
+                cache.delete(lock_key)
+    return wrapper
@@ -0,0 +1,52 @@
+"""Jinja2 environment with the helpers the Django templates rely on."""
+import logging
+
+from django.template import defaultfilters
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.timezone import template_localtime
+from jinja2 import Environment
+from sorl.thumbnail import get_thumbnail
+from sorl.thumbnail.conf import settings as sorl_settings
+
+from core.templatetags.user_filters import addclass
+
+logger = logging.getLogger(__name__)
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args, kwargs=kwargs)
+
+
+def thumbnail(file, geometry, **options):
+    """Return the thumbnail like the sorl tag does, None if it fails."""
+    if not file:
+        return None
+    try:
+        return get_thumbnail(file, geometry, **options)
+    except Exception:
+        if sorl_settings.THUMBNAIL_DEBUG:
+            raise
+        logger.exception('Thumbnail helper failed')
+        return None
+
+
+def date(value, arg=None):
+    """Format the date in the current time zone like the date filter."""
+    return defaultfilters.date(template_localtime(value), arg)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        'static': static,
+        'thumbnail': thumbnail,
+        'url': url,
+    })
+    env.filters.update({
+        'addclass': addclass,
+        'date': date,
+        'linebreaks': defaultfilters.linebreaks_filter,
+        'truncatewords': defaultfilters.truncatewords,
+    })
+    return env
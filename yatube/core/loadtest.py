@@ -0,0 +1,173 @@
+import http.client
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from urllib.parse import urlencode
+
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler
+from django.db import connections
+
+from .budgets import QueryLog
+
+Request = namedtuple('Request', 'method path data headers')
+
+# Average number of extra queries per request tolerated against a baseline,
+# cache hits and races make the average drift a little between runs.
+QUERY_SLACK = 0.5
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    """Request handler that does not log every request."""
+
+    def log_message(self, format, *args):
+        pass
+
+
+class QueryCountingApplication:
+    """WSGI application that remembers the number of queries per request."""
+
+    def __init__(self, application):
+        self.application = application
+        self.queries = []
+
+    def __call__(self, environ, start_response):
+        log = QueryLog()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(log))
+            response = self.application(environ, start_response)
+            try:
+                content = b''.join(response)
+            finally:
+                if hasattr(response, 'close'):
+                    response.close()
+        self.queries.append(len(log.statements))
+        return [content]
+
+
+class Server:
+    """Serve the application on a free local port from a thread."""
+
+    def __init__(self, application, host='127.0.0.1'):
+        self.httpd = ThreadedWSGIServer((host, 0), QuietRequestHandler)
+        self.httpd.set_app(application)
+        self.address = self.httpd.server_address[:2]
+        self.thread = threading.Thread(target=self.httpd.serve_forever)
+        self.thread.daemon = True
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.thread.join()
+
+
+def send(address, request):
+    """Send the request, return its latency in seconds and status."""
+    headers = dict(request.headers)
+    body = None
+    if request.data is not None:
+        body = urlencode(request.data)
+        headers['Content-Type'] = 'application/x-www-form-urlencoded'
+    connection = http.client.HTTPConnection(*address, timeout=60)
+    started = time.perf_counter()
+    try:
+        connection.request(request.method, request.path, body, headers)
+        response = connection.getresponse()
+        response.read()
+        status = response.status
+    except (OSError, http.client.HTTPException):
+        status = None
+    finally:
+        connection.close()
+    return time.perf_counter() - started, status
+
+
+def run(address, requests_by_client):
+    """Send the requests of every client concurrently.
+
+    Return the latencies, statuses and the wall time of the run.
+    """
+    def send_all(requests):
+        return [send(address, request) for request in requests]
+
+    with ThreadPoolExecutor(len(requests_by_client)) as executor:
+        started = time.perf_counter()
+        results = list(executor.map(send_all, requests_by_client))
+        elapsed = time.perf_counter() - started
+    results = [result for client in results for result in client]
+    latencies = [latency for latency, _ in results]
+    statuses = [status for _, status in results]
+    return latencies, statuses, elapsed
+
+
+def percentile(values, percent):
+    """Return the percentile, interpolating between the closest ranks."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    position = (len(ordered) - 1) * percent / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (
+        position - lower
+    )
+
+
+def summarize(latencies, statuses, elapsed, queries):
+    """Return the statistics of one route."""
+    def milliseconds(value):
+        return None if value is None else round(value * 1000, 2)
+
+    return {
+        'requests': len(latencies),
+        'errors': sum(
+            1 for status in statuses if status is None or status >= 400
+        ),
+        'p50_ms': milliseconds(percentile(latencies, 50)),
+        'p95_ms': milliseconds(percentile(latencies, 95)),
+        'p99_ms': milliseconds(percentile(latencies, 99)),
+        'max_ms': milliseconds(max(latencies, default=None)),
+        'rps': round(len(latencies) / elapsed, 2) if elapsed else None,
+        'queries': (
+            round(sum(queries) / len(queries), 2) if queries else None
+        ),
+    }
+
+
+def compare(routes, baseline, tolerance):
+    """Return the regressions of the routes against the baseline."""
+    regressions = []
+    for name, result in routes.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if (result['p95_ms'] and base['p95_ms']
+                and result['p95_ms'] > base['p95_ms'] * (1 + tolerance)):
+            regressions.append(
+                f'{name}: p95 {result["p95_ms"]} ms, '
+                f'baseline {base["p95_ms"]} ms'
+            )
+        if (result['rps'] and base['rps']
+                and result['rps'] < base['rps'] * (1 - tolerance)):
+            regressions.append(
+                f'{name}: {result["rps"]} requests/s, '
+                f'baseline {base["rps"]} requests/s'
+            )
+        if (result['queries'] is not None and base['queries'] is not None
+                and result['queries'] > base['queries'] + QUERY_SLACK):
+            regressions.append(
+                f'{name}: {result["queries"]} queries, '
+                f'baseline {base["queries"]} queries'
+            )
+        if result['errors'] > base['errors']:
+            regressions.append(
+                f'{name}: {result["errors"]} errors, '
+                f'baseline {base["errors"]} errors'
+            )
+    return regressions
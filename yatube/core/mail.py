@@ -0,0 +1,152 @@
+"""Outbox of the site mail.
+
+Requests only store their messages, the send_outbox worker sends them in
+batches through OUTBOX_EMAIL_BACKEND and retries failures with backoff.
+"""
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+class OutboxBackend(BaseEmailBackend):
+    """Email backend that puts the messages into the outbox table."""
+
+    def send_messages(self, email_messages):
+        emails = [
+            to_outbox(message) for message in email_messages
+            if message.recipients()
+        ]
+        OutgoingEmail.objects.bulk_create(emails)
+        return len(emails)
+
+
+def to_outbox(message):
+    """Return the outbox row keeping the message as plain data."""
+    if message.attachments:
+        raise ValueError('The outbox does not keep attachments.')
+    return OutgoingEmail(
+        subject=message.subject,
+        body=message.body,
+        content_subtype=message.content_subtype,
+        from_email=message.from_email,
+        recipients=', '.join(message.recipients()),
+        addresses=json.dumps({
+            'to': message.to,
+            'cc': message.cc,
+            'bcc': message.bcc,
+            'reply_to': message.reply_to,
+        }),
+        headers=json.dumps(message.extra_headers),
+        alternatives=json.dumps(getattr(message, 'alternatives', [])),
+    )
+
+
+def from_outbox(email, connection=None):
+    """Build the message of the outbox row again."""
+    message = EmailMultiAlternatives(
+        subject=email.subject,
+        body=email.body,
+        from_email=email.from_email,
+        connection=connection,
+        headers=json.loads(email.headers),
+        alternatives=[
+            tuple(alternative)
+            for alternative in json.loads(email.alternatives)
+        ],
+        **json.loads(email.addresses)
+    )
+    message.content_subtype = email.content_subtype
+    return message
+
+
+def retry_delay(attempts):
+    """Return the pause before the next attempt, doubling every time."""
+    return timedelta(seconds=min(
+        settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1),
+        settings.OUTBOX_RETRY_MAX_DELAY
+    ))
+
+
+def claim(batch_size):
+    """Take due emails for OUTBOX_LEASE seconds, so other workers skip them.
+
+    Only pending rows are taken, by one conditional update marking them
+    with a new claim, so a row read by two workers goes to one of them.
+    """
+    now = timezone.now()
+    # Emails of a worker that stopped while sending them are due again.
+    OutgoingEmail.objects.filter(
+        status=OutgoingEmail.SENDING, send_after__lte=now
+    ).update(status=OutgoingEmail.PENDING, claim='')
+    due = OutgoingEmail.objects.filter(
+        status=OutgoingEmail.PENDING,
+        send_after__lte=now,
+        attempts__lt=settings.OUTBOX_MAX_ATTEMPTS
+    ).order_by('send_after', 'pk').values_list('pk', flat=True)
+    token = uuid.uuid4().hex
+    taken = OutgoingEmail.objects.filter(
+        pk__in=list(due[:batch_size]), status=OutgoingEmail.PENDING
+    ).update(
+        status=OutgoingEmail.SENDING,
+        claim=token,
+        send_after=now + timedelta(seconds=settings.OUTBOX_LEASE)
+    )
+    if not taken:
+        return []
+    return list(OutgoingEmail.objects.filter(claim=token))
+
+
+def failed(email, error):
+    attempts = email.attempts + 1
+    OutgoingEmail.objects.filter(pk=email.pk).update(
+        status=OutgoingEmail.PENDING,
+        claim='',
+        attempts=F('attempts') + 1,
+        send_after=timezone.now() + retry_delay(attempts),
+        error=str(error) or error.__class__.__name__
+    )
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        logger.error('Email %s is not sent: %s', email.pk, error)
+
+
+def deliver(batch_size=None):
+    """Send a batch of due emails over one connection.
+
+    Return the numbers of the sent and the failed emails.
+    """
+    emails = claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+    sent = []
+    failures = 0
+    mail_connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        mail_connection.open()
+    except Exception as error:
+        for email in emails:
+            failed(email, error)
+        return 0, len(emails)
+    try:
+        for email in emails:
+            try:
+                mail_connection.send_messages([from_outbox(email)])
+            except Exception as error:
+                failed(email, error)
+                failures += 1
+            else:
+                sent.append(email.pk)
+    finally:
+        mail_connection.close()
+        OutgoingEmail.objects.filter(pk__in=sent).delete()
+    return len(sent), failures
@@ -0,0 +1,45 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Copy the SQLite database while it is in use and delete the oldest '
+        'copies.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--directory',
+            default=settings.SQLITE_BACKUP_DIR,
+            help='Directory the backups are kept in.',
+        )
+        parser.add_argument(
+            '--keep',
+            type=int,
+            default=settings.SQLITE_BACKUP_KEEP,
+            help='Number of the newest backups kept.',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            help='Pages copied per step, -1 copies the database at once.',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        directory = options['directory']
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, sqlite.backup_name(using))
+        try:
+            sqlite.backup(path, using, options['pages'])
+        except ValueError as error:
+            raise CommandError(error)
+        for stale in sqlite.prune(directory, max(options['keep'], 1), using):
+            self.stdout.write(f'Deleted {stale}.')
+        self.stdout.write(self.style.SUCCESS(f'Saved {path}.'))
@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from core import replicas, sqlite
+
+
+class Command(BaseCommand):
+    help = (
+        'Replace SQLite replicas with fresh copies of the primary database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            action='append',
+            dest='databases',
+            help='Replica to copy to, all of DATABASE_REPLICAS by default.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=60,
+            help='Seconds between two copies.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Copy the database once and exit.',
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['databases'] or settings.DATABASE_REPLICAS
+        for alias in aliases:
+            if alias not in settings.DATABASE_REPLICAS:
+                raise CommandError(f'{alias} is not in DATABASE_REPLICAS.')
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(f'{alias} does not use SQLite.')
+        try:
+            while True:
+                replicas.beat()
+                for alias in aliases:
+                    connections[alias].close()
+                    sqlite.backup(connections[alias].settings_dict['NAME'])
+                    self.stdout.write(f'Copied to {alias}.')
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from core import replicas
+
+
+class Command(BaseCommand):
+    help = (
+        'Write the time to the primary database regularly, its replicas '
+        'tell their lag by it.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1,
+            help='Seconds between two heartbeats.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Write one heartbeat and exit.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                replicas.beat()
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core import sqlite
+
+
+class Command(BaseCommand):
+    help = 'Refresh the statistics of the SQLite query planner regularly.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=settings.SQLITE_OPTIMIZE_INTERVAL,
+            help='Seconds between two runs of PRAGMA optimize.',
+        )
+        parser.add_argument(
+            '--analyze',
+            action='store_true',
+            help='Run a full ANALYZE first.',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Optimize the database and exit.',
+        )
+
+    def handle(self, *args, **options):
+        analyze = options['analyze']
+        try:
+            while True:
+                started = time.monotonic()
+                try:
+                    sqlite.optimize(options['database'], analyze)
+                except ValueError as error:
+                    raise CommandError(error)
+                self.stdout.write(
+                    f'Optimized in {time.monotonic() - started:.2f} s.'
+                )
+                if options['once']:
+                    break
+                analyze = False
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
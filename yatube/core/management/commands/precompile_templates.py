@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from core.template_loaders import precompile
+
+
+class Command(BaseCommand):
+    help = 'Compile all project templates and report the time it takes.'
+
+    def handle(self, *args, **options):
+        count, elapsed = precompile()
+        self.stdout.write(self.style.SUCCESS(
+            f'Compiled {count} templates in {elapsed * 1000:.1f} ms.'
+        ))
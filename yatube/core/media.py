@@ -0,0 +1,150 @@
+import mimetypes
+import os
+import posixpath
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class FileRange:
+    """Part of an open file that is not read past its end.
+
+    The file number is kept, so WSGI servers can still send the part with
+    sendfile starting from the current position.
+    """
+
+    def __init__(self, file, start, length):
+        file.seek(start)
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def byte_range(header, size):
+    """Return (start, end) of the requested bytes, None for the whole file.
+
+    Malformed and multiple ranges are ignored, a range past the end of the
+    file raises ValueError.
+    """
+    match = RANGE.match(header.strip())
+    if match is None or match.group(1) == match.group(2) == '':
+        return None
+    first, last = match.groups()
+    if first == '':
+        length = int(last)
+        if length == 0:
+            raise ValueError('Empty suffix range.')
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if last and end < start:
+        return None
+    if start >= size:
+        raise ValueError('Range starts past the end of the file.')
+    return start, min(end, size - 1)
+
+
+def media_path(path):
+    """Return the name and path of a public media file or raise Http404."""
+    name = posixpath.normpath(path).lstrip('/')
+    if (name.startswith('..') or not name.startswith(
+            tuple(settings.MEDIA_PUBLIC_DIRS))
+            or any(part.startswith('.') for part in name.split('/'))):
+        raise Http404
+    full_path = os.path.join(settings.MEDIA_ROOT, *name.split('/'))
+    if not os.path.isfile(full_path):
+        raise Http404
+    return name, full_path
+
+
+def not_modified(request, etag, mtime):
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match is not None:
+        return etag in if_none_match or if_none_match.strip() == '*'
+    since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    return since is not None and int(mtime) <= since
+
+
+def accelerated(name, full_path):
+    """Return a response telling the front server to send the file."""
+    response = HttpResponse()
+    if settings.MEDIA_ACCEL == 'x-accel-redirect':
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_PREFIX + quote(name)
+        )
+    else:
+        response['X-Sendfile'] = full_path
+    return response
+
+
+def streamed(request, full_path, size, etag, last_modified):
+    """Return the file or the requested part of it from Django."""
+    header = request.META.get('HTTP_RANGE')
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if header is None or if_range not in (None, etag, last_modified):
+        return FileResponse(open(full_path, 'rb'))
+    try:
+        requested = byte_range(header, size)
+    except ValueError:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+    if requested is None:
+        return FileResponse(open(full_path, 'rb'))
+    start, end = requested
+    response = FileResponse(
+        FileRange(open(full_path, 'rb'), start, end - start + 1),
+        status=206
+    )
+    response['Content-Length'] = end - start + 1
+    response['Content-Range'] = f'bytes {start}-{end}/{size}'
+    return response
+
+
+@require_safe
+def serve(request, path):
+    """Return an uploaded image or its thumbnail.
+
+    The bytes are sent by the front web server when MEDIA_ACCEL is set,
+    by Django otherwise.
+    """
+    name, full_path = media_path(path)
+    stat = os.stat(full_path)
+    etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+    last_modified = http_date(stat.st_mtime)
+    if not_modified(request, etag, stat.st_mtime):
+        response = HttpResponse(status=304)
+    elif settings.MEDIA_ACCEL:
+        response = accelerated(name, full_path)
+    else:
+        response = streamed(
+            request, full_path, stat.st_size, etag, last_modified
+        )
+    content_type, _ = mimetypes.guess_type(name)
+    if response.status_code != 416:
+        response['Content-Type'] = content_type or 'application/octet-stream'
+    response['ETag'] = etag
+    response['Last-Modified'] = last_modified
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = f'public, max-age={settings.MEDIA_MAX_AGE}'
+    return response
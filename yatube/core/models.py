@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class CreatedModel(models.Model):
@@ -10,3 +11,74 @@ class CreatedModel(models.Model):
 
     class Meta:
         abstract = True
+
+
+class OutgoingEmail(CreatedModel):
+    """Email waiting in the outbox for the send_outbox worker.
+
+    The message is kept as plain text and JSON and built again when it
+    is sent.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    STATUSES = (
+        (PENDING, 'Ждёт отправки'),
+        (SENDING, 'Отправляется'),
+    )
+
+    subject = models.TextField('Тема', blank=True)
+    body = models.TextField('Текст', blank=True)
+    content_subtype = models.CharField(
+        'Тип текста',
+        max_length=32,
+        default='plain'
+    )
+    from_email = models.TextField('Отправитель')
+    recipients = models.TextField('Получатели')
+    addresses = models.TextField(
+        'Адреса',
+        default='{}',
+        help_text='JSON с полями to, cc, bcc и reply_to'
+    )
+    headers = models.TextField('Заголовки', default='{}')
+    alternatives = models.TextField('Другие версии текста', default='[]')
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    claim = models.CharField('Метка отправителя', max_length=32, blank=True)
+    attempts = models.PositiveIntegerField('Попыток отправки', default=0)
+    send_after = models.DateTimeField(
+        'Отправить после',
+        default=timezone.now
+    )
+    error = models.TextField('Последняя ошибка', blank=True)
+
+    class Meta:
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+        ordering = ('send_after', 'pk')
+        indexes = [
+            models.Index(
+                fields=['status', 'send_after'],
+                name='outbox_status_due_idx'
+            ),
+            models.Index(fields=['claim'], name='outbox_claim_idx'),
+        ]
+
+    def __str__(self):
+        return self.subject[:15]
+
+
+class Heartbeat(models.Model):
+    """Time written to the primary database and read from its replicas."""
+    beat = models.DateTimeField('Отметка времени')
+
+    class Meta:
+        verbose_name = 'Отметка репликации'
+        verbose_name_plural = 'Отметки репликации'
+
+    def __str__(self):
+        return str(self.beat)
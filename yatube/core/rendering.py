@@ -0,0 +1,51 @@
+import logging
+
+from django import shortcuts
+from django.conf import settings
+from django.template import engines
+
+from .streaming import stream
+
+logger = logging.getLogger(__name__)
+
+
+def template_engine(request):
+    """Return the alias of the engine set for the view, None by default."""
+    match = request.resolver_match
+    if match is None:
+        return None
+    alias = settings.TEMPLATE_ENGINES.get(match.view_name)
+    if alias is not None and alias not in engines.templates:
+        logger.warning(
+            'Template engine %s of %s is not configured, using the default',
+            alias, match.view_name
+        )
+        return None
+    return alias
+
+
+def streaming(request):
+    """Whether the page of the view is sent while it is rendered.
+
+    Pages the page cache keeps are rendered whole.
+    """
+    match = request.resolver_match
+    return (
+        match is not None
+        and match.view_name in settings.STREAMING_VIEWS
+        and getattr(request, 'cache_dependencies', None) is None
+    )
+
+
+def render(request, template_name, context=None, content_type=None,
+           status=None, using=None):
+    """Render the template with the engine the settings pick for the view."""
+    if using is None:
+        using = template_engine(request)
+    if streaming(request):
+        return stream(
+            request, template_name, context, content_type, status, using
+        )
+    return shortcuts.render(
+        request, template_name, context, content_type, status, using
+    )
@@ -0,0 +1,150 @@
+"""Reads of the read-only views from replicas of the primary database.
+
+Replicas are the aliases of DATABASES listed in DATABASE_REPLICAS. The
+primary writes the time into the heartbeat table, a replica's copy of it
+tells how far the replica is behind.
+"""
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError
+from django.utils import timezone
+
+from .models import Heartbeat
+
+# Sessions are read where they are written, so a session ended on the
+# primary does not come back from a replica.
+PRIMARY_APPS = ('sessions',)
+SAFE_METHODS = ('GET', 'HEAD')
+
+_state = threading.local()
+_lags = {}
+
+
+def read_replica(view):
+    """Let the reads of the view go to a replica."""
+    view.read_replica = True
+    return view
+
+
+def current():
+    """Return the replica the request reads from, None for the primary."""
+    return getattr(_state, 'replica', None)
+
+
+def pin():
+    """Remember the request wrote, so its user reads from the primary."""
+    _state.wrote = True
+
+
+def beat(using=DEFAULT_DB_ALIAS):
+    """Write the current time to the heartbeat of the primary."""
+    Heartbeat.objects.using(using).update_or_create(
+        pk=1, defaults={'beat': timezone.now()}
+    )
+
+
+def lag(alias):
+    """Return how many seconds the replica is behind, None if unknown."""
+    now = time.monotonic()
+    checked = _lags.get(alias)
+    if (checked is not None
+            and now - checked[0] < settings.REPLICA_LAG_CHECK_INTERVAL):
+        return checked[1]
+    try:
+        last_beat = Heartbeat.objects.using(alias).values_list(
+            'beat', flat=True
+        ).first()
+    except DatabaseError:
+        last_beat = None
+    seconds = None
+    if last_beat is not None:
+        seconds = max((timezone.now() - last_beat).total_seconds(), 0)
+    _lags[alias] = (now, seconds)
+    return seconds
+
+
+def choose_replica():
+    """Return a replica close enough to the primary, None if there is none."""
+    fresh = []
+    for alias in settings.DATABASE_REPLICAS:
+        seconds = lag(alias)
+        if seconds is not None and seconds <= settings.REPLICA_MAX_LAG:
+            fresh.append(alias)
+    return random.choice(fresh) if fresh else None
+
+
+class ReplicaRouter:
+    """Send the reads of the request to its replica, the rest to the primary.
+
+    Writes are remembered, so the user is pinned to the primary after them.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.app_label in PRIMARY_APPS:
+            return None
+        return current()
+
+    def db_for_write(self, model, **hints):
+        pin()
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """Pick the database the request reads from.
+
+    Safe requests to read_replica views read from a fresh replica unless
+    the user wrote something in the last REPLICA_PIN_SECONDS.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        _state.replica = None
+        _state.wrote = False
+        try:
+            response = self.get_response(request)
+            replica = _state.replica
+        finally:
+            _state.replica = None
+        if _state.wrote:
+            response.set_cookie(
+                settings.REPLICA_PIN_COOKIE,
+                '1',
+                max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite='Lax',
+            )
+        if replica is not None and response.streaming:
+            response.streaming_content = self.streamed(
+                replica, response.streaming_content
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (getattr(view_func, 'read_replica', False)
+                and request.method in SAFE_METHODS
+                and settings.REPLICA_PIN_COOKIE not in request.COOKIES):
+            request.replica = _state.replica = choose_replica()
+
+    def streamed(self, replica, content):
+        """Keep reading from the replica while the body is sent."""
+        _state.replica = replica
+        try:
+            yield from content
+        finally:
+            _state.replica = None
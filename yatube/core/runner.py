@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+class TestRunner(DiscoverRunner):
+    """Run the tests without process pools set up from the real settings.
+
+    Thumbnail workers would write to the real database and media root.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._thumbnail_workers = settings.THUMBNAIL_WORKERS
+        settings.THUMBNAIL_WORKERS = 0
+
+    def teardown_test_environment(self, **kwargs):
+        settings.THUMBNAIL_WORKERS = self._thumbnail_workers
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,157 @@
+"""SQLite in production: connection pragmas, locked writes, maintenance."""
+import logging
+import os
+import random
+import sqlite3
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+LOCKED_ERRORS = ('database is locked', 'database table is locked')
+
+
+def configure(sender, connection, **kwargs):
+    """Set SQLITE_PRAGMAS on a new SQLite connection.
+
+    The pragmas go to the DB-API connection, so query logs and budgets
+    of the request opening it do not count them. Replicas are copies
+    replaced as a whole, they are only read and keep their journal mode.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = dict(settings.SQLITE_PRAGMAS)
+    if connection.alias in settings.DATABASE_REPLICAS:
+        pragmas.pop('journal_mode', None)
+        pragmas['query_only'] = 1
+    for name, value in pragmas.items():
+        connection.connection.execute(f'PRAGMA {name} = {value}')
+
+
+def is_locked(error):
+    return str(error).startswith(LOCKED_ERRORS)
+
+
+def retry_locked(func):
+    """Run func in a transaction, again while the database is locked.
+
+    A transaction started as a reader is not let in by a writer that
+    committed meanwhile, so the whole transaction is run again after a
+    random pause. Inside an outer transaction the error is raised at once.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        nested = transaction.get_connection().in_atomic_block
+        attempt = 0
+        while True:
+            try:
+                with transaction.atomic():
+                    return func(*args, **kwargs)
+            except OperationalError as error:
+                if (nested or not is_locked(error)
+                        or attempt >= settings.SQLITE_WRITE_RETRIES):
+                    raise
+            delay = settings.SQLITE_RETRY_DELAY * 2 ** attempt
+            attempt += 1
+            logger.info(
+                'Database is locked, running %s again, attempt %d',
+                func.__name__, attempt
+            )
+            time.sleep(random.uniform(0, delay))
+    return wrapper
+
+
+def sqlite_connection(using):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        raise ValueError(f'Database {using} does not use SQLite.')
+    return connection
+
+
+def optimize(using='default', analyze=False):
+    """Let SQLite refresh the statistics the query planner needs."""
+    with sqlite_connection(using).cursor() as cursor:
+        if analyze:
+            cursor.execute('ANALYZE')
+        cursor.execute('PRAGMA optimize')
+
+
+def estimated_rows(table, using='default'):
+    """Return the number of rows of the table known to ANALYZE.
+
+    None for other databases and for tables not analyzed yet, see
+    optimize_database --analyze.
+    """
+    if connections[using].vendor != 'sqlite':
+        return None
+    with connections[using].cursor() as cursor:
+        try:
+            cursor.execute(
+                'SELECT stat FROM sqlite_stat1 WHERE tbl = %s', [table]
+            )
+        except OperationalError:
+            return None
+        counts = [int(stat.split()[0]) for stat, in cursor.fetchall()]
+    return max(counts, default=None)
+
+
+def journal_mode(using='default'):
+    with sqlite_connection(using).cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode')
+        return cursor.fetchone()[0]
+
+
+def backup(path, using='default', pages=None):
+    """Copy the database to path through the SQLite online backup API.
+
+    The copy is written next to path and moved there once it is checked,
+    so path never holds a partial backup.
+    """
+    connection = sqlite_connection(using)
+    if connection.in_atomic_block:
+        # The copy would wait for the transaction of its own connection.
+        raise ValueError('A database cannot be backed up in a transaction.')
+    if pages is None:
+        pages = -1 if journal_mode(using) == 'wal' else (
+            settings.SQLITE_BACKUP_PAGES
+        )
+    connection.ensure_connection()
+    partial = f'{path}.part'
+    target = sqlite3.connect(partial)
+    try:
+        connection.connection.backup(target, pages=pages, sleep=0.05)
+        result = target.execute('PRAGMA quick_check').fetchone()[0]
+        if result != 'ok':
+            raise sqlite3.DatabaseError(f'Backup is damaged: {result}')
+        # A copy in WAL mode would pick up a -wal file left next to path.
+        target.execute('PRAGMA journal_mode = delete')
+    except Exception:
+        target.close()
+        os.remove(partial)
+        raise
+    target.close()
+    os.replace(partial, path)
+    return path
+
+
+def backup_name(using='default'):
+    return f'{using}-{timezone.now():%Y%m%d-%H%M%S-%f}.sqlite3'
+
+
+def prune(directory, keep, using='default'):
+    """Delete all but the keep newest backups, return the deleted paths."""
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(f'{using}-') and name.endswith('.sqlite3')
+    )
+    stale = [
+        os.path.join(directory, name)
+        for name in names[:max(len(names) - keep, 0)]
+    ]
+    for path in stale:
+        os.remove(path)
+    return stale
@@ -0,0 +1,123 @@
+import mimetypes
+import os
+import posixpath
+from wsgiref.util import FileWrapper
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.utils.http import http_date
+
+# Encodings in the order of preference and suffixes of their copies.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+CHUNK_SIZE = 64 * 1024
+
+
+def accepted_encodings(header):
+    """Return the codings the Accept-Encoding header allows."""
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0
+        if coding and quality > 0:
+            accepted.add(coding.strip().lower())
+    if '*' in accepted:
+        accepted.update(coding for coding, _ in ENCODINGS)
+    return accepted
+
+
+class StaticFilesApplication:
+    """WSGI application serving the collected static files.
+
+    Requests for other paths go to the wrapped application. A file is
+    sent as its brotli or gzip copy when the client accepts it, files
+    with the content hash in the name are cached by browsers for
+    STATIC_MAX_AGE.
+    """
+
+    def __init__(self, application, root=None, prefix=None):
+        self.application = application
+        self.root = os.path.abspath(root or settings.STATIC_ROOT)
+        self.prefix = prefix or settings.STATIC_URL
+        self.immutable = set(
+            getattr(staticfiles_storage, 'hashed_files', {}).values()
+        )
+
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        method = environ.get('REQUEST_METHOD')
+        if method not in ('GET', 'HEAD') or not path.startswith(self.prefix):
+            return self.application(environ, start_response)
+        name = self.clean_name(path[len(self.prefix):])
+        if name is None:
+            return self.application(environ, start_response)
+        return self.serve(environ, start_response, name)
+
+    def clean_name(self, name):
+        """Return the name of an existing file under the root or None."""
+        name = posixpath.normpath(name).lstrip('/')
+        if not name or name.startswith('..') or name.endswith(
+            tuple(suffix for _, suffix in ENCODINGS)
+        ):
+            return None
+        path = os.path.join(self.root, *name.split('/'))
+        if not os.path.isfile(path):
+            return None
+        return name
+
+    def variant(self, environ, name):
+        """Return the path and encoding of the file to send."""
+        path = os.path.join(self.root, *name.split('/'))
+        accepted = accepted_encodings(environ.get('HTTP_ACCEPT_ENCODING', ''))
+        for coding, suffix in ENCODINGS:
+            if coding in accepted and os.path.isfile(path + suffix):
+                return path + suffix, coding
+        return path, None
+
+    def has_variants(self, name):
+        path = os.path.join(self.root, *name.split('/'))
+        return any(
+            os.path.isfile(path + suffix) for _, suffix in ENCODINGS
+        )
+
+    def serve(self, environ, start_response, name):
+        path, coding = self.variant(environ, name)
+        stat = os.stat(path)
+        etag = f'"{stat.st_mtime_ns:x}-{stat.st_size:x}-{coding or "id"}"'
+        content_type, _ = mimetypes.guess_type(name)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in (
+            'application/javascript', 'application/json'
+        ):
+            content_type += '; charset=utf-8'
+        headers = [
+            ('Content-Type', content_type),
+            ('Last-Modified', http_date(stat.st_mtime)),
+            ('ETag', etag),
+        ]
+        if name in self.immutable:
+            headers.append((
+                'Cache-Control',
+                f'public, max-age={settings.STATIC_MAX_AGE}, immutable'
+            ))
+        else:
+            headers.append(('Cache-Control', 'no-cache'))
+        if coding:
+            headers.append(('Content-Encoding', coding))
+        if self.has_variants(name):
+            headers.append(('Vary', 'Accept-Encoding'))
+        if etag in environ.get('HTTP_IF_NONE_MATCH', ''):
+            start_response('304 Not Modified', headers)
+            return []
+        headers.append(('Content-Length', str(stat.st_size)))
+        start_response('200 OK', headers)
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return []
+        wrapper = environ.get('wsgi.file_wrapper', FileWrapper)
+        return wrapper(open(path, 'rb'), CHUNK_SIZE)
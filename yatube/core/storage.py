@@ -0,0 +1,61 @@
+import gzip
+
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Extensions of the text assets worth compressing, images and fonts in
+# modern formats are compressed already.
+COMPRESSIBLE = (
+    '.css', '.js', '.map', '.svg', '.json', '.xml', '.txt', '.html',
+    '.ico', '.ttf', '.otf', '.eot',
+)
+# Copies that save less than this share of the size are not written.
+MIN_SAVING = 0.05
+
+
+def compressors():
+    """Return (suffix, compress) of every available encoding."""
+    result = [('.gz', lambda data: gzip.compress(data, 9, mtime=0))]
+    if brotli is not None:
+        result.append(('.br', lambda data: brotli.compress(data, quality=11)))
+    return result
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Manifest storage that also writes gzip and brotli copies of assets.
+
+    The copies lie next to the hashed files, so a static server can send
+    them without compressing anything per request.
+    """
+
+    def stored_name(self, name):
+        if not self.hashed_files:
+            # collectstatic has not run, e.g. in development and tests.
+            return name
+        return super().stored_name(name)
+
+    def post_process(self, paths, dry_run=False, **options):
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for name in sorted(set(self.hashed_files.values())):
+            if name.lower().endswith(COMPRESSIBLE):
+                yield from self.compress(name)
+
+    def compress(self, name):
+        """Write the compressed copies of the file worth keeping."""
+        with self.open(name) as file:
+            data = file.read()
+        for suffix, compress in compressors():
+            compressed = compress(data)
+            if len(compressed) > len(data) * (1 - MIN_SAVING):
+                continue
+            if self.exists(name + suffix):
+                self.delete(name + suffix)
+            self._save(name + suffix, ContentFile(compressed))
+            yield name, name + suffix, True
@@ -0,0 +1,171 @@
+"""Pages sent while they are rendered.
+
+A Django template marks the slow parts with {% streamed %}. The rest of
+the page is rendered first, the head and header are sent at once and the
+marked parts are rendered node by node, a loop one item at a time, while
+the response is sent. {% streamed %} must not be put inside tags that
+keep their output, like {% cache %}. Jinja2 templates are generated
+lazily as a whole.
+"""
+import re
+import secrets
+from copy import copy
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from django.middleware.csrf import get_token
+from django.template import Node, loader
+from django.template.backends.utils import csrf_input_lazy, csrf_token_lazy
+from django.template.defaulttags import ForNode
+from django.template.loader_tags import IncludeNode
+
+# Context variable holding the parts put off by {% streamed %}.
+DEFERRED = '_streamed'
+# Chunk telling coalesce() to send what it has collected.
+FLUSH = object()
+
+
+class StreamedNode(Node):
+    def __init__(self, nodelist):
+        self.nodelist = nodelist
+
+    def render(self, context):
+        deferred = context.get(DEFERRED)
+        if deferred is None:
+            return self.nodelist.render(context)
+        return deferred.add(self.nodelist, context)
+
+
+class Deferred:
+    """Parts of a page put off until the rest of it is sent."""
+
+    def __init__(self):
+        self.token = secrets.token_hex(8)
+        self.parts = []
+
+    def add(self, nodelist, context):
+        """Keep the nodes with a copy of the context, return a marker."""
+        snapshot = copy(context)
+        snapshot.dicts = [dict(values) for values in context.dicts]
+        snapshot[DEFERRED] = None
+        self.parts.append((nodelist, snapshot))
+        return f'<!--streamed:{self.token}:{len(self.parts) - 1}-->'
+
+    def chunks(self, html):
+        """Yield the page, rendering the parts in place of the markers."""
+        marker = re.compile(f'<!--streamed:{self.token}:(\\d+)-->')
+        position = 0
+        for match in marker.finditer(html):
+            yield html[position:match.start()]
+            yield FLUSH
+            nodelist, context = self.parts[int(match.group(1))]
+            yield from render_nodes(nodelist, context)
+            position = match.end()
+        yield html[position:]
+
+
+def render_nodes(nodelist, context):
+    """Yield the output of the nodes, of loops item by item."""
+    for node in nodelist:
+        if isinstance(node, StreamedNode):
+            yield from render_nodes(node.nodelist, context)
+        elif (isinstance(node, ForNode) and len(node.loopvars) == 1
+                and not node.is_reversed):
+            yield from render_loop(node, context)
+        elif (isinstance(node, IncludeNode) and not node.extra_context
+                and not node.isolated_context):
+            yield from render_include(node, context)
+        else:
+            yield node.render_annotated(context)
+
+
+def render_loop(node, context):
+    """Yield the body of the {% for %} loop once per item."""
+    values = node.sequence.resolve(context, ignore_failures=True)
+    if values is None:
+        values = []
+    if not hasattr(values, '__len__'):
+        values = list(values)
+    count = len(values)
+    if not count:
+        yield from render_nodes(node.nodelist_empty, context)
+        return
+    parentloop = context.get('forloop', {})
+    with context.push():
+        for index, item in enumerate(values):
+            context['forloop'] = {
+                'parentloop': parentloop,
+                'counter0': index,
+                'counter': index + 1,
+                'revcounter': count - index,
+                'revcounter0': count - index - 1,
+                'first': index == 0,
+                'last': index == count - 1,
+            }
+            context[node.loopvars[0]] = item
+            yield from render_nodes(node.nodelist_loop, context)
+
+
+def render_include(node, context):
+    """Yield the included template the way render_nodes() does."""
+    template = node.template.resolve(context)
+    if not callable(getattr(template, 'render', None)):
+        template = context.template.engine.get_template(template)
+    elif hasattr(template, 'template'):
+        template = template.template
+    with context.render_context.push_state(template):
+        yield from render_nodes(template.nodelist, context)
+
+
+def coalesce(chunks, size=None):
+    """Join small chunks, so every write carries enough of the page."""
+    size = size or settings.STREAM_CHUNK_SIZE
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        if chunk is not FLUSH:
+            if not chunk:
+                continue
+            buffer.append(chunk)
+            length += len(chunk)
+        if buffer and (chunk is FLUSH or length >= size):
+            yield ''.join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def jinja2_chunks(template, context, request):
+    """Generate a Jinja2 template with the context its backend gives it."""
+    context = dict(context or {})
+    context.update(
+        request=request,
+        csrf_input=csrf_input_lazy(request),
+        csrf_token=csrf_token_lazy(request),
+    )
+    for processor in template.backend.template_context_processors:
+        context.update(processor(request))
+    return template.template.generate(context)
+
+
+def stream(request, template_name, context=None, content_type=None,
+           status=None, using=None):
+    """Return a response sending the page while it is rendered."""
+    template = loader.get_template(template_name, using=using)
+    # Middleware sets the CSRF cookie and Vary: Cookie before the body is
+    # rendered, so both are asked for now.
+    get_token(request)
+    if hasattr(request, 'user'):
+        request.user.is_authenticated
+    if hasattr(getattr(template, 'template', None), 'generate'):
+        chunks = jinja2_chunks(template, context, request)
+    else:
+        deferred = Deferred()
+        html = template.render(
+            dict(context or {}, **{DEFERRED: deferred}), request
+        )
+        chunks = deferred.chunks(html)
+    return StreamingHttpResponse(
+        coalesce(chunks), content_type=content_type, status=status
+    )
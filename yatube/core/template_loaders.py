@@ -0,0 +1,93 @@
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import engines
+from django.template.backends.django import DjangoTemplates
+from django.template.loaders import cached
+
+logger = logging.getLogger(__name__)
+
+
+class Loader(cached.Loader):
+    """Cached loader that can compile the templates in advance.
+
+    With ``reload`` a template is compiled again when its file changes,
+    so templates can be edited without a restart during development.
+    """
+
+    def __init__(self, engine, loaders, reload=False):
+        super().__init__(engine, loaders)
+        self.reload = reload
+        self.mtimes = {}
+
+    def get_template(self, template_name, skip=None):
+        template = super().get_template(template_name, skip)
+        if self.reload and self.changed(template.origin.name):
+            self.get_template_cache.pop(
+                self.cache_key(template_name, skip), None
+            )
+            template = super().get_template(template_name, skip)
+        return template
+
+    def changed(self, path):
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return False
+        previous = self.mtimes.get(path)
+        self.mtimes[path] = mtime
+        return previous is not None and previous != mtime
+
+    def template_names(self, root):
+        """Return names of the templates found in directories under root."""
+        names = []
+        for loader in self.loaders:
+            for directory in loader.get_dirs():
+                directory = str(directory)
+                if not os.path.abspath(directory).startswith(root):
+                    continue
+                for path, _, files in os.walk(directory):
+                    names.extend(
+                        os.path.relpath(
+                            os.path.join(path, name), directory
+                        ).replace(os.sep, '/')
+                        for name in files if not name.startswith('.')
+                    )
+        return names
+
+    def precompile(self, root):
+        """Compile every template under root, return their number."""
+        names = set(self.template_names(root))
+        for name in names:
+            self.get_template(name)
+        return len(names)
+
+
+def precompile_jinja2(env):
+    """Compile every template of the Jinja2 environment into its cache."""
+    names = env.list_templates()
+    for name in names:
+        env.get_template(name)
+    return len(names)
+
+
+def precompile(root=None):
+    """Compile the project templates of every engine at once.
+
+    Return the number of templates and the time it took in seconds.
+    """
+    root = os.path.abspath(root or settings.BASE_DIR)
+    started = time.perf_counter()
+    count = 0
+    for engine in engines.all():
+        if isinstance(engine, DjangoTemplates):
+            for loader in engine.engine.template_loaders:
+                if isinstance(loader, Loader):
+                    count += loader.precompile(root)
+        elif hasattr(engine, 'env'):
+            count += precompile_jinja2(engine.env)
+    elapsed = time.perf_counter() - started
+    logger.info('Compiled %d templates in %.1f ms', count, elapsed * 1000)
+    return count, elapsed
@@ -0,0 +1,13 @@
+from django import template
+
+from core.streaming import StreamedNode
+
+register = template.Library()
+
+
+@register.tag
+def streamed(parser, token):
+    """Render the enclosed part after the page above it is sent."""
+    nodelist = parser.parse(('endstreamed',))
+    parser.delete_first_token()
+    return StreamedNode(nodelist)
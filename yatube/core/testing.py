@@ -0,0 +1,25 @@
+import pytest
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'no_query_budget: do not fail the test on exceeded query budgets'
+    )
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(request, settings):
+    """Fail the test when a view runs over its query budget."""
+    if request.node.get_closest_marker('no_query_budget') is None:
+        settings.QUERY_BUDGET_STRICT = True
+
+
+@pytest.fixture(autouse=True)
+def render_thumbnails_in_process(settings):
+    """Render thumbnails in the test, with its database and settings.
+
+    Pool workers set Django up from the real settings, so they would
+    write to the real database and media root.
+    """
+    settings.THUMBNAIL_WORKERS = 0
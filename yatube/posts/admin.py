@@ -1,9 +1,39 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
 
+from core.caching import bump, generation_key
+from . import search
 from .models import Comment, Follow, Group, Post
+from .utils import EstimatedCountPaginator
 
 
-class PostAdmin(admin.ModelAdmin):
+class LargeTableAdmin(admin.ModelAdmin):
+    """Changelist of a table too large to count or scan on every page."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    empty_value_display = '-пусто-'
+
+
+class PostActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа'
+    )
+
+
+def refresh_posts(posts):
+    """Invalidate the pages of (pk, author_id) posts changed in bulk."""
+    keys = {generation_key('feed'), generation_key('groups')}
+    for pk, author_id in posts:
+        keys.add(generation_key('post', pk))
+        keys.add(generation_key('user', author_id))
+    bump(*keys)
+
+
+class PostAdmin(LargeTableAdmin):
     list_display = (
         'pk',
         'text',
@@ -11,16 +41,87 @@ class PostAdmin(admin.ModelAdmin):
         'author',
         'group',
     )
-    list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('created',)
-    empty_value_display = '-пусто-'
+    date_hierarchy = 'created'
+    raw_id_fields = ('author',)
+    autocomplete_fields = ('group',)
+    action_form = PostActionForm
+    actions = ('move_to_group', 'remove_from_group')
+
+    def get_search_results(self, request, queryset, search_term):
+        """Search words of the text and the author in the full-text index."""
+        if not search_term:
+            return queryset, False
+        return search.filter_posts(queryset, search_term), False
+
+    def get_deleted_objects(self, objs, request):
+        """Count the comments deleted with the posts instead of listing them.
+
+        A post fanned out to thousands of feeds would list every entry.
+        """
+        posts = list(objs)
+        comments = Comment.objects.filter(post__in=objs).count()
+        model_count = {Post._meta.verbose_name_plural: len(posts)}
+        perms_needed = set()
+        if comments:
+            model_count[Comment._meta.verbose_name_plural] = comments
+            if not request.user.has_perm('posts.delete_comment'):
+                perms_needed.add(Comment._meta.verbose_name)
+        return [str(post) for post in posts], model_count, perms_needed, []
+
+    def move_to_group(self, request, queryset):
+        try:
+            group = PostActionForm.base_fields['group'].clean(
+                request.POST.get('group')
+            )
+        except ValidationError:
+            group = None
+        if group is None:
+            self.message_user(
+                request, 'Выберите группу.', level=messages.WARNING
+            )
+            return
+        posts = list(queryset.values_list('pk', 'author_id'))
+        moved = queryset.update(group=group)
+        refresh_posts(posts)
+        self.message_user(request, f'Перенесено постов: {moved}.')
+    move_to_group.short_description = 'Перенести в группу'
+
+    def remove_from_group(self, request, queryset):
+        posts = list(queryset.values_list('pk', 'author_id'))
+        removed = queryset.update(group=None)
+        refresh_posts(posts)
+        self.message_user(request, f'Убрано из групп постов: {removed}.')
+    remove_from_group.short_description = 'Убрать из группы'
+
+
+class GroupAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'title', 'slug')
+    search_fields = ('title', 'slug')
+    prepopulated_fields = {'slug': ('title',)}
+
+
+class CommentAdmin(LargeTableAdmin):
+    list_display = ('pk', 'text', 'created', 'author', 'post')
+    list_select_related = ('author', 'post')
+    search_fields = ('=author__username',)
+    date_hierarchy = 'created'
+    raw_id_fields = ('author', 'post')
+
+
+class FollowAdmin(LargeTableAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
+    raw_id_fields = ('user', 'author')
 
 
 admin.site.register(Post, PostAdmin)
 
-admin.site.register(Group)
+admin.site.register(Group, GroupAdmin)
 
-admin.site.register(Comment)
+admin.site.register(Comment, CommentAdmin)
 
-admin.site.register(Follow)
+admin.site.register(Follow, FollowAdmin)
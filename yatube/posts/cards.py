@@ -0,0 +1,94 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from core.caching import generation_key, get_generations
+
+CARD_TEMPLATE = 'posts/includes/article.html'
+HITS_KEY = 'cards:hits'
+MISSES_KEY = 'cards:misses'
+
+
+def _dependencies(post):
+    keys = [
+        generation_key('post', post.pk),
+        generation_key('author', post.author_id),
+    ]
+    if post.group_id:
+        keys.append(generation_key('group', post.group_id))
+    return keys
+
+
+def card_key(post, versions):
+    parts = ':'.join(str(versions[key]) for key in _dependencies(post))
+    return f'cards:card:{post.pk}:{parts}'
+
+
+def render_card(post, using=None):
+    return render_to_string(CARD_TEMPLATE, {'post': post}, using=using)
+
+
+def _count(key, delta):
+    if not delta:
+        return
+    if not cache.add(key, delta, None):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            cache.set(key, delta, None)
+
+
+def iter_cards(posts, using=None):
+    """Yield the post cards, taking the rendered ones from the cache."""
+    posts = list(posts)
+    cacheable = [
+        post for post in posts if not getattr(post, 'highlighted', None)
+    ]
+    versions = get_generations(
+        {key for post in cacheable for key in _dependencies(post)}
+    )
+    keys = {post.pk: card_key(post, versions) for post in cacheable}
+    cached = cache.get_many(keys.values())
+    rendered = {}
+    for post in posts:
+        key = keys.get(post.pk)
+        html = cached.get(key) if key else None
+        if html is None:
+            html = render_card(post, using)
+            if key:
+                rendered[key] = html
+        yield mark_safe(html)
+    if rendered:
+        cache.set_many(rendered, settings.POST_CARD_CACHE_TIMEOUT)
+    _count(HITS_KEY, len(cached))
+    _count(MISSES_KEY, len(rendered))
+
+
+def render_cards(posts, using=None):
+    """Return the post cards, taking the rendered ones from the cache."""
+    return list(iter_cards(posts, using))
+
+
+class LazyCards:
+    """Cards of the posts rendered one by one as they are iterated over."""
+
+    def __init__(self, posts, using=None):
+        self.posts = posts
+        self.using = using
+
+    def __len__(self):
+        return len(self.posts)
+
+    def __iter__(self):
+        return iter_cards(self.posts, self.using)
+
+
+def stats():
+    """Return the numbers of cache hits and misses."""
+    counters = cache.get_many([HITS_KEY, MISSES_KEY])
+    return counters.get(HITS_KEY, 0), counters.get(MISSES_KEY, 0)
+
+
+def reset_stats():
+    cache.delete_many([HITS_KEY, MISSES_KEY])
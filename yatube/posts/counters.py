@@ -0,0 +1,127 @@
+from collections import Counter
+
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import follows, shards
+from .models import Comment, Follow, Post, User, UserStats
+
+
+def _count(queryset, field, outer_field):
+    """Return a subquery counting the queryset rows per outer row."""
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{field: OuterRef(outer_field)})
+            .order_by()
+            .values(field)
+            .annotate(total=Count('pk'))
+            .values('total')
+        ),
+        0
+    )
+
+
+def reconcile_user(user_id):
+    """Recount the user's counters from the source tables."""
+    stats, _ = UserStats.objects.update_or_create(
+        user_id=user_id,
+        defaults={
+            'posts_count': shards.for_author(
+                Post.objects, user_id
+            ).filter(author_id=user_id).count(),
+            'followers_count': Follow.objects.filter(
+                author_id=user_id
+            ).count(),
+            'following_count': Follow.objects.filter(
+                user_id=user_id
+            ).count(),
+        }
+    )
+    return stats
+
+
+def get_stats(user):
+    """Return the user's counters, creating them if they are missing.
+
+    Authors read with a post from a shard come without their counters.
+    """
+    try:
+        return user.stats
+    except UserStats.DoesNotExist:
+        pass
+    stats = UserStats.objects.filter(user_id=user.pk).first()
+    return stats or reconcile_user(user.pk)
+
+
+def increment(user_id, field):
+    """Add one to the user's counter."""
+    updated = UserStats.objects.filter(user_id=user_id).update(
+        **{field: F(field) + 1}
+    )
+    if not updated:
+        reconcile_user(user_id)
+
+
+def decrement(user_id, field):
+    """Subtract one from the user's counter."""
+    UserStats.objects.filter(user_id=user_id, **{f'{field}__gt': 0}).update(
+        **{field: F(field) - 1}
+    )
+
+
+def change_comments(post_id, delta):
+    """Change the post's comment counter by delta."""
+    posts = shards.for_post(Post.objects, post_id).filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comments_count__gte=-delta)
+    posts.update(comments_count=F('comments_count') + delta)
+
+
+def reconcile():
+    """Recount all counters, return the number of fixed rows."""
+    missing = User.objects.filter(stats__isnull=True).values_list(
+        'pk', flat=True
+    )
+    UserStats.objects.bulk_create(
+        [UserStats(user_id=user_id) for user_id in missing]
+    )
+    fixed = 0
+    counters = [
+        ('followers_count', Follow.objects.all(), 'author_id'),
+        ('following_count', Follow.objects.all(), 'user_id'),
+    ]
+    if shards.enabled():
+        fixed += _reconcile_sharded_posts()
+    else:
+        counters.append(('posts_count', Post.objects.all(), 'author_id'))
+    for counter, source, field in counters:
+        real = _count(source, field, 'user_id')
+        fixed += UserStats.objects.exclude(**{counter: real}).update(
+            **{counter: real}
+        )
+    for using in shards.databases():
+        real = _count(Comment.objects.using(using), 'post_id', 'pk')
+        fixed += Post.objects.using(using).exclude(
+            comments_count=real
+        ).update(comments_count=real)
+    follows.forget_popular()
+    return fixed
+
+
+def _reconcile_sharded_posts():
+    """Recount the posts of the authors summed over the shards."""
+    real = Counter()
+    for using in shards.databases():
+        real.update(dict(
+            Post.objects.using(using).order_by().values('author_id')
+            .annotate(total=Count('pk')).values_list('author_id', 'total')
+        ))
+    fixed = 0
+    for user_id, posts_count in UserStats.objects.values_list(
+        'user_id', 'posts_count'
+    ).iterator():
+        if real[user_id] != posts_count:
+            fixed += UserStats.objects.filter(user_id=user_id).update(
+                posts_count=real[user_id]
+            )
+    return fixed
@@ -0,0 +1,113 @@
+from array import array
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow, UserStats
+
+POPULAR_KEY = 'follows:popular'
+
+
+def _following_key(user_id):
+    return f'follows:following:{user_id}'
+
+
+def _load(key, ids):
+    """Return the cached sorted ids, loading them on a miss.
+
+    Ids are kept as a packed array, so a large set takes eight bytes
+    per author and is checked with a binary search.
+    """
+    data = cache.get(key)
+    if data is not None:
+        cached = array('q')
+        cached.frombytes(data)
+        return cached
+    loaded = array('q', ids())
+    cache.set(key, loaded.tobytes(), settings.FOLLOW_CACHE_TIMEOUT)
+    return loaded
+
+
+def _contains(ids, value):
+    index = bisect_left(ids, value)
+    return index < len(ids) and ids[index] == value
+
+
+def _forget(key):
+    """Drop the cached ids now and once more after the commit.
+
+    The second delete removes ids that a concurrent request loaded
+    before the transaction was committed.
+    """
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def following_ids(user_id):
+    """Return the sorted ids of the authors the user follows."""
+    return _load(
+        _following_key(user_id),
+        lambda: Follow.objects.filter(user_id=user_id).order_by(
+            'author_id'
+        ).values_list('author_id', flat=True)
+    )
+
+
+def popular_ids():
+    """Return the sorted ids of the authors that are not fanned out."""
+    return _load(
+        POPULAR_KEY,
+        lambda: sorted(
+            UserStats.objects.filter(
+                followers_count__gte=settings.TIMELINE_FANOUT_LIMIT
+            ).values_list('user_id', flat=True)
+        )
+    )
+
+
+def is_following(user_id, author_id):
+    """Whether the user follows the author."""
+    return _contains(following_ids(user_id), author_id)
+
+
+def is_popular(author_id):
+    """Whether the author's posts are merged into feeds at read time."""
+    return _contains(popular_ids(), author_id)
+
+
+def popular_following_ids(user_id):
+    """Return ids of the popular authors the user follows."""
+    popular = popular_ids()
+    if not popular:
+        return []
+    return [
+        author_id for author_id in following_ids(user_id)
+        if _contains(popular, author_id)
+    ]
+
+
+def forget(user_id):
+    """Forget the cached authors the user follows."""
+    _forget(_following_key(user_id))
+
+
+def forget_popular():
+    """Forget the popular authors, e.g. after the counters were recounted."""
+    _forget(POPULAR_KEY)
+
+
+def changed(user_id, author_id):
+    """Forget the sets touched by a new or removed subscription.
+
+    Return the new number of followers of the author.
+    """
+    forget(user_id)
+    followers = UserStats.objects.filter(user_id=author_id).values_list(
+        'followers_count', flat=True
+    ).first()
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    if followers in (limit - 1, limit):
+        forget_popular()
+    return followers
@@ -0,0 +1,62 @@
+import os
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from PIL import Image, ImageOps
+
+ALLOWED_FORMATS = ('JPEG', 'PNG', 'GIF', 'WEBP')
+METADATA_KEYS = ('exif', 'xmp', 'XML:com.adobe.xmp', 'comment', 'photoshop')
+
+
+def _has_metadata(image):
+    return any(key in image.info for key in METADATA_KEYS)
+
+
+def ingest(upload):
+    """Return the uploaded image ready to be stored.
+
+    Only the header is read before the checks, big images are decoded
+    at a reduced scale and written through a spooled file, so memory
+    use does not grow with the size of the original.
+    """
+    upload.seek(0)
+    image = Image.open(upload)
+    width, height = image.size
+    if image.format not in ALLOWED_FORMATS:
+        raise ValidationError(
+            'Поддерживаются только изображения JPEG, PNG, GIF и WebP.'
+        )
+    if width * height > settings.IMAGE_MAX_PIXELS:
+        raise ValidationError('Изображение слишком большое.')
+    max_width, max_height = settings.IMAGE_MAX_SIZE
+    fits = width <= max_width and height <= max_height
+    if getattr(image, 'is_animated', False):
+        if not fits:
+            raise ValidationError('Анимация слишком большая.')
+        upload.seek(0)
+        return upload
+    if (fits and not _has_metadata(image)
+            and upload.size <= settings.IMAGE_PASSTHROUGH_BYTES):
+        upload.seek(0)
+        return upload
+    if image.format == 'JPEG':
+        image.draft('RGB', (max_width, max_height))
+    image = ImageOps.exif_transpose(image)
+    image.thumbnail((max_width, max_height), reducing_gap=3.0)
+    has_alpha = image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+    image = image.convert('RGBA' if has_alpha else 'RGB')
+    output = SpooledTemporaryFile(
+        max_size=settings.FILE_UPLOAD_MAX_MEMORY_SIZE
+    )
+    image.save(
+        output,
+        format=settings.IMAGE_FORMAT,
+        quality=settings.IMAGE_QUALITY
+    )
+    output.seek(0)
+    name = os.path.splitext(os.path.basename(upload.name))[0]
+    return File(output, name=f'{name}.{settings.IMAGE_FORMAT.lower()}')
@@ -0,0 +1,17 @@
+from core.jinja import environment as base_environment
+
+from .cards import LazyCards
+
+# Alias Django gives the Jinja2 backend in TEMPLATES.
+ENGINE = 'jinja2'
+
+
+def post_cards(posts):
+    """Return cards of the posts, rendered as they are iterated over."""
+    return LazyCards(posts, using=ENGINE)
+
+
+def environment(**options):
+    env = base_environment(**options)
+    env.globals['post_cards'] = post_cards
+    return env
@@ -0,0 +1,442 @@
+import json
+import math
+import os
+import platform
+import random
+import tempfile
+from datetime import datetime, timezone
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.contrib.auth.tokens import default_token_generator
+from django.core.files.base import ContentFile
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.http import HttpRequest
+from django.middleware.csrf import get_token
+from django.test import Client, override_settings
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+from django.utils.encoding import force_bytes
+from django.utils.http import urlsafe_base64_encode
+from mixer.backend.django import mixer
+from PIL import Image
+
+from core import loadtest
+from posts.models import Comment, Follow, Group, Post, User
+
+
+def zipf_weights(count, exponent=1.1):
+    """Weights giving the first items most of the activity."""
+    return [1 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def jpeg(seed):
+    """Return a small JPEG image."""
+    buffer = BytesIO()
+    color = random.Random(seed).choice(('red', 'green', 'blue', 'grey'))
+    Image.new('RGB', (1200, 800), color).save(buffer, format='JPEG')
+    return buffer.getvalue()
+
+
+class Dataset:
+    """Posts, comments and follows seeded with mixer."""
+
+    def __init__(self, options):
+        self.random = random.Random(options['seed'])
+        random.seed(options['seed'])
+        mixer.faker.seed_instance(options['seed'])
+        self.users = mixer.cycle(options['users']).blend(
+            User,
+            username=(
+                f'{mixer.faker.user_name()}{number}'
+                for number in range(options['users'])
+            )
+        )
+        self.groups = mixer.cycle(options['groups']).blend(Group)
+        self.popularity = zipf_weights(len(self.users))
+        authors = self.random.choices(
+            self.users, self.popularity, k=options['posts']
+        )
+        groups = self.random.choices(
+            self.groups + [None], k=options['posts']
+        )
+        self.posts = mixer.cycle(options['posts']).blend(
+            Post,
+            author=(author for author in authors),
+            group=(group for group in groups),
+            image=''
+        )
+        for number, post in enumerate(
+            self.random.sample(
+                self.posts, min(options['images'], len(self.posts))
+            )
+        ):
+            post.image.save(f'bench{number}.jpg', ContentFile(jpeg(number)))
+        self.hotness = zipf_weights(len(self.posts))
+        posts = self.random.choices(
+            self.posts, self.hotness, k=options['comments']
+        )
+        commenters = self.random.choices(self.users, k=options['comments'])
+        mixer.cycle(options['comments']).blend(
+            Comment,
+            post=(post for post in posts),
+            author=(author for author in commenters)
+        )
+        for user in self.users:
+            authors = set(self.random.choices(
+                self.users, self.popularity, k=options['following']
+            ))
+            authors.discard(user)
+            for author in authors:
+                Follow.objects.create(user=user, author=author)
+        self.words = [
+            word for word in mixer.faker.words(50) if len(word) > 3
+        ] or ['lorem']
+
+    def user(self):
+        return self.random.choices(self.users, self.popularity)[0]
+
+    def post(self):
+        return self.random.choices(self.posts, self.hotness)[0]
+
+    def group(self):
+        return self.random.choice(self.groups)
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed a test database and measure the latency of every page '
+        'under concurrent load.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--groups', type=int, default=10)
+        parser.add_argument('--posts', type=int, default=2000)
+        parser.add_argument('--comments', type=int, default=4000)
+        parser.add_argument(
+            '--following',
+            type=int,
+            default=20,
+            help='Number of authors every user tries to follow.',
+        )
+        parser.add_argument('--images', type=int, default=20)
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=200,
+            help='Number of requests sent to every route.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=8,
+            help='Number of clients sending requests at once.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--output',
+            default='benchmark.json',
+            help='File the results are written to.',
+        )
+        parser.add_argument(
+            '--baseline',
+            help='Results of an earlier run to compare with.',
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=0.2,
+            help='Allowed slowdown against the baseline, 0.2 is 20%%.',
+        )
+
+    def handle(self, *args, **options):
+        if options['concurrency'] < 1 or options['requests'] < 1:
+            raise CommandError('Concurrency and requests must be positive.')
+        if options['users'] < options['concurrency'] + 1:
+            raise CommandError('There must be more users than clients.')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as file:
+                baseline = json.load(file)
+        connection = connections['default']
+        with tempfile.TemporaryDirectory() as directory:
+            if connection.vendor == 'sqlite':
+                connection.settings_dict['TEST']['NAME'] = os.path.join(
+                    directory, 'benchmark.sqlite3'
+                )
+            with override_settings(
+                DEBUG=False,
+                MEDIA_ROOT=os.path.join(directory, 'media'),
+                THUMBNAIL_WORKERS=0,
+                QUERY_BUDGET_STRICT=False,
+                EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            ):
+                old_config = setup_databases(
+                    verbosity=0, interactive=False, aliases=['default']
+                )
+                try:
+                    self.stdout.write('Seeding the database...')
+                    dataset = Dataset(options)
+                    routes = self.measure(dataset, options)
+                finally:
+                    teardown_databases(old_config, verbosity=0)
+        results = {
+            'meta': {
+                'created': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'options': {
+                    key: options[key] for key in (
+                        'users', 'groups', 'posts', 'comments',
+                        'following', 'images', 'requests', 'concurrency',
+                        'seed'
+                    )
+                },
+            },
+            'routes': routes,
+        }
+        with open(options['output'], 'w') as file:
+            json.dump(results, file, indent=2, ensure_ascii=False)
+        self.report(routes)
+        self.stdout.write(f'Results are saved to {options["output"]}.')
+        if baseline is not None:
+            regressions = loadtest.compare(
+                routes, baseline['routes'], options['tolerance']
+            )
+            for regression in regressions:
+                self.stderr.write(regression)
+            if regressions:
+                raise CommandError(
+                    f'{len(regressions)} regressions against the baseline.'
+                )
+            self.stdout.write(self.style.SUCCESS('No regressions.'))
+
+    def measure(self, dataset, options):
+        """Load every route in turn and return their statistics."""
+        application = loadtest.QueryCountingApplication(WSGIHandler())
+        clients = Clients(dataset, options)
+        routes = {}
+        with loadtest.Server(application) as server:
+            for name, auth, build in clients.routes():
+                application.queries = []
+                latencies, statuses, elapsed = loadtest.run(
+                    server.address, clients.requests(auth, build)
+                )
+                routes[name] = loadtest.summarize(
+                    latencies, statuses, elapsed, application.queries
+                )
+                self.stdout.write(
+                    f'{name}: p95 {routes[name]["p95_ms"]} ms'
+                )
+        return routes
+
+    def report(self, routes):
+        self.stdout.write(
+            f'{"route":<36}{"p50":>9}{"p95":>9}{"p99":>9}'
+            f'{"req/s":>9}{"queries":>9}{"errors":>8}'
+        )
+        for name, result in routes.items():
+            self.stdout.write(
+                f'{name:<36}{result["p50_ms"]:>9}{result["p95_ms"]:>9}'
+                f'{result["p99_ms"]:>9}{result["rps"]:>9}'
+                f'{result["queries"]:>9}{result["errors"]:>8}'
+            )
+
+
+class Clients:
+    """Sessions of the concurrent clients and the requests they send."""
+
+    def __init__(self, dataset, options):
+        self.dataset = dataset
+        self.count = options['concurrency']
+        self.per_client = math.ceil(options['requests'] / self.count)
+        self.users = dataset.users[-self.count:]
+        self.csrf_cookie, self.csrf_token = self.csrf()
+        self.sessions = [self.login(user) for user in self.users]
+        self.own_posts = [
+            mixer.cycle(self.per_client).blend(Post, author=user, image='')
+            for user in self.users
+        ]
+        self.own_comments = [
+            mixer.cycle(self.per_client).blend(
+                Comment, author=user, post=dataset.post
+            )
+            for user in self.users
+        ]
+        self.to_follow = [
+            [
+                author for author in dataset.users
+                if author != user and not Follow.objects.filter(
+                    user=user, author=author
+                ).exists()
+            ]
+            for user in self.users
+        ]
+
+    def csrf(self):
+        request = HttpRequest()
+        token = get_token(request)
+        return request.META['CSRF_COOKIE'], token
+
+    def login(self, user):
+        client = Client()
+        client.force_login(user)
+        return client.cookies[settings.SESSION_COOKIE_NAME].value
+
+    def headers(self, session=None):
+        cookies = f'{settings.CSRF_COOKIE_NAME}={self.csrf_cookie}'
+        if session is not None:
+            cookies += f'; {settings.SESSION_COOKIE_NAME}={session}'
+        return {'Cookie': cookies, 'X-CSRFToken': self.csrf_token}
+
+    def requests(self, auth, build):
+        """Return the requests of every client for the route."""
+        requests = []
+        for client in range(self.count):
+            session = self.sessions[client] if auth else None
+            client_requests = []
+            for number in range(self.per_client):
+                method, path, data = build(client, number)
+                if auth == 'fresh':
+                    session = self.login(self.users[client])
+                client_requests.append(loadtest.Request(
+                    method, path, data, self.headers(session)
+                ))
+            requests.append(client_requests)
+        return requests
+
+    def routes(self):
+        """Return (name, auth, build) of every route to load."""
+        dataset = self.dataset
+        reset_user = dataset.users[0]
+        uid = urlsafe_base64_encode(force_bytes(reset_user.pk))
+        token = default_token_generator.make_token(reset_user)
+
+        def get(name, **kwargs):
+            path = reverse(name, **kwargs)
+            return lambda client, number: ('GET', path, None)
+
+        return [
+            ('posts:index', False, lambda client, number: (
+                'GET', f'{reverse("posts:index")}?page={number % 5 + 1}', None
+            )),
+            ('posts:index:auth', True, lambda client, number: (
+                'GET', f'{reverse("posts:index")}?page={number % 5 + 1}', None
+            )),
+            ('posts:search_results', False, lambda client, number: (
+                'GET',
+                f'{reverse("posts:search_results")}'
+                f'?q={dataset.random.choice(dataset.words)}',
+                None
+            )),
+            ('posts:group_list', False, lambda client, number: (
+                'GET',
+                reverse('posts:group_list', args=[dataset.group().slug]),
+                None
+            )),
+            ('posts:profile', False, lambda client, number: (
+                'GET',
+                reverse('posts:profile', args=[dataset.user().username]),
+                None
+            )),
+            ('posts:post_detail', False, lambda client, number: (
+                'GET',
+                reverse('posts:post_detail', args=[dataset.post().pk]),
+                None
+            )),
+            ('posts:post_detail:auth', True, lambda client, number: (
+                'GET',
+                reverse('posts:post_detail', args=[dataset.post().pk]),
+                None
+            )),
+            ('posts:comment_list', False, lambda client, number: (
+                'GET',
+                reverse('posts:comment_list', args=[dataset.post().pk]),
+                None
+            )),
+            ('posts:follow_index', True, get('posts:follow_index')),
+            ('posts:post_create', True, lambda client, number: (
+                'POST',
+                reverse('posts:post_create'),
+                {
+                    'text': mixer.faker.text(),
+                    'group': dataset.group().pk,
+                }
+            )),
+            ('posts:edit', True, lambda client, number: (
+                'POST',
+                reverse(
+                    'posts:edit', args=[self.own_posts[client][number].pk]
+                ),
+                {'text': mixer.faker.text()}
+            )),
+            ('posts:add_comment', True, lambda client, number: (
+                'POST',
+                reverse('posts:add_comment', args=[dataset.post().pk]),
+                {'text': mixer.faker.sentence()}
+            )),
+            ('posts:profile_follow', True, lambda client, number: (
+                'GET',
+                reverse('posts:profile_follow', args=[
+                    self.to_follow[client][
+                        number % len(self.to_follow[client])
+                    ].username
+                ]),
+                None
+            )),
+            ('posts:profile_unfollow', True, lambda client, number: (
+                'GET',
+                reverse('posts:profile_unfollow', args=[
+                    self.to_follow[client][
+                        number % len(self.to_follow[client])
+                    ].username
+                ]),
+                None
+            )),
+            ('posts:comment_delete', True, lambda client, number: (
+                'GET',
+                reverse('posts:comment_delete', args=[
+                    self.own_comments[client][number].post_id,
+                    self.own_comments[client][number].pk
+                ]),
+                None
+            )),
+            ('posts:post_delete', True, lambda client, number: (
+                'GET',
+                reverse(
+                    'posts:post_delete',
+                    args=[self.own_posts[client][number].pk]
+                ),
+                None
+            )),
+            ('about:author', False, get('about:author')),
+            ('about:tech', False, get('about:tech')),
+            ('users:signup', False, get('users:signup')),
+            ('users:login', False, get('users:login')),
+            ('users:password_reset', False, get('users:password_reset')),
+            (
+                'users:password_reset_done',
+                False,
+                get('users:password_reset_done')
+            ),
+            ('users:password_reset_confirm', False, get(
+                'users:password_reset_confirm', args=[uid, token]
+            )),
+            (
+                'users:password_reset_complete',
+                False,
+                get('users:password_reset_complete')
+            ),
+            ('users:password_change', True, get('users:password_change')),
+            (
+                'users:password_change_done',
+                True,
+                get('users:password_change_done')
+            ),
+            ('users:logout', 'fresh', get('users:logout')),
+        ]
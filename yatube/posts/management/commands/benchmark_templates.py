@@ -0,0 +1,149 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.core.paginator import Paginator
+from django.template import engines
+from django.test import RequestFactory, override_settings
+from django.urls import resolve, reverse
+
+from core.loadtest import percentile
+from posts.counters import get_stats
+from posts.forms import CommentForm
+from posts.models import Comment, Post
+from posts.utils import CursorPage
+
+DUMMY_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+    }
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Render the post pages with every template engine and compare '
+        'the time it takes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--renders',
+            type=int,
+            default=200,
+            help='Number of renders of every template by every engine.',
+        )
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=settings.POSTS_NUM,
+            help='Number of the latest posts on a feed page.',
+        )
+
+    def handle(self, *args, **options):
+        if options['renders'] < 1 or options['posts'] < 1:
+            raise CommandError('Renders and posts must be positive.')
+        posts = list(
+            Post.objects.select_related('author', 'group').order_by(
+                '-created', '-pk'
+            )[:options['posts']]
+        )
+        if not posts:
+            raise CommandError('There are no posts, run generate_data.')
+        aliases = [engine.name for engine in engines.all()]
+        if len(aliases) < 2:
+            self.stderr.write('Only one template engine is configured.')
+        pages = self.pages(posts)
+        results = {}
+        # Without a cache every render builds the post cards, fragments
+        # and thumbnail lookups from scratch.
+        with override_settings(CACHES=DUMMY_CACHES):
+            for name, template_name, request, context in pages:
+                for alias in aliases:
+                    results[name, alias] = self.measure(
+                        engines[alias].get_template(template_name),
+                        request, context, options['renders']
+                    )
+        self.report(pages, aliases, results)
+
+    def pages(self, posts):
+        """Return (view, template, request, context) of every page."""
+        page_obj = Paginator(posts, len(posts)).page(1)
+        page_obj.elided_page_range = [1]
+        post = posts[0]
+        author = post.author
+        comments = list(
+            Comment.objects.filter(post=post).select_related('author')[
+                :settings.COMMENTS_NUM
+            ]
+        )
+        pages = [
+            ('posts:index', 'posts/index.html', {}, {'page_obj': page_obj}),
+            ('posts:profile', 'posts/profile.html',
+             {'username': author.username}, {
+                 'author': author,
+                 'stats': get_stats(author),
+                 'page_obj': page_obj,
+                 'following': False,
+             }),
+            ('posts:follow_index', 'posts/follow.html', {},
+             {'page_obj': page_obj}),
+            ('posts:post_detail', 'posts/post_detail.html',
+             {'post_id': post.pk}, {
+                 'post': post,
+                 'author': author,
+                 'author_stats': get_stats(author),
+                 'form': CommentForm(),
+                 'comments': CursorPage(comments, None, None),
+             }),
+        ]
+        grouped = next((post for post in posts if post.group_id), None)
+        if grouped is not None:
+            pages.append((
+                'posts:group_list', 'posts/group_list.html',
+                {'slug': grouped.group.slug},
+                {'group': grouped.group, 'page_obj': page_obj}
+            ))
+        factory = RequestFactory()
+        result = []
+        for name, template_name, kwargs, context in pages:
+            request = factory.get(reverse(name, kwargs=kwargs))
+            request.resolver_match = resolve(request.path)
+            request.user = AnonymousUser()
+            result.append((name, template_name, request, context))
+        return result
+
+    def measure(self, template, request, context, renders):
+        """Return the render times of the template in seconds."""
+        template.render(dict(context), request)
+        timings = []
+        for _ in range(renders):
+            started = time.perf_counter()
+            template.render(dict(context), request)
+            timings.append(time.perf_counter() - started)
+        return timings
+
+    def report(self, pages, aliases, results):
+        self.stdout.write(
+            f'{"template":<28}{"engine":<10}{"mean":>9}{"p50":>9}'
+            f'{"p95":>9}'
+        )
+        for name, template_name, _, _ in pages:
+            for alias in aliases:
+                timings = results[name, alias]
+                self.stdout.write(
+                    f'{template_name:<28}{alias:<10}'
+                    f'{sum(timings) / len(timings) * 1000:>9.2f}'
+                    f'{percentile(timings, 50) * 1000:>9.2f}'
+                    f'{percentile(timings, 95) * 1000:>9.2f}'
+                )
+            if len(aliases) > 1:
+                base = sum(results[name, aliases[0]])
+                for alias in aliases[1:]:
+                    ratio = base / sum(results[name, alias])
+                    self.stdout.write(
+                        f'{template_name}: {alias} renders {ratio:.2f} '
+                        f'times as fast as {aliases[0]}'
+                    )
+        self.stdout.write('Times are in milliseconds.')
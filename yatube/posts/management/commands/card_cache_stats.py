@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from posts import cards
+
+
+class Command(BaseCommand):
+    help = 'Show hits and misses of the post card cache.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Reset the counters after showing them.',
+        )
+
+    def handle(self, *args, **options):
+        hits, misses = cards.stats()
+        total = hits + misses
+        ratio = hits / total * 100 if total else 0
+        self.stdout.write(
+            f'Hits: {hits}, misses: {misses}, hit ratio: {ratio:.1f}%'
+        )
+        if options['reset']:
+            cards.reset_stats()
@@ -0,0 +1,226 @@
+import multiprocessing
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+from faker import Faker
+
+from posts import counters, search, synthetic, timeline
+from posts.models import Comment, Follow, Group, Post, User
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, posts, comments and '
+        'follows skewed like the real ones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--groups', type=int, default=50)
+        parser.add_argument('--posts', type=int, default=100000)
+        parser.add_argument('--comments', type=int, default=300000)
+        parser.add_argument(
+            '--follows',
+            type=int,
+            default=200000,
+            help='Approximate number of subscriptions.',
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=365,
+            help='Period the posts are spread over.',
+        )
+        parser.add_argument(
+            '--exponent',
+            type=float,
+            default=1.1,
+            help='Power-law exponent of the activity of users and posts.',
+        )
+        parser.add_argument('--seed', type=int, default=1)
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20000,
+            help='Number of rows built and inserted at once.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=0,
+            help='Number of processes building rows, 0 builds them here.',
+        )
+        parser.add_argument(
+            '--prefix',
+            default='synthetic',
+            help='Prefix of the usernames and group slugs.',
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 2:
+            raise CommandError('At least two users are needed.')
+        if options['posts'] < 1 and options['comments']:
+            raise CommandError('Comments need posts.')
+        self.options = options
+        faker = Faker('ru_RU')
+        faker.seed_instance(options['seed'])
+        end = timezone.now().replace(minute=0, second=0, microsecond=0)
+        plan = {
+            'seed': options['seed'],
+            'users': options['users'],
+            'posts': options['posts'],
+            'exponent': options['exponent'],
+            'start': end - timedelta(days=options['days']),
+            'span': timedelta(days=options['days']).total_seconds(),
+            'comment_delay': 6 * 3600,
+            'follows_per_user': options['follows'] / options['users'],
+            'grouped': 0.3,
+            'vocabulary': faker.words(nb=2000),
+            'user_base': self.next_id(User),
+            'post_base': self.next_id(Post),
+            'joined': end - timedelta(days=options['days']),
+        }
+        search.uninstall()
+        try:
+            self.create_users(plan)
+            plan['group_ids'] = self.create_groups(faker)
+            self.load(plan, 'posts', options['posts'], self.save_posts)
+            self.load(
+                plan, 'comments', options['comments'], self.save_comments
+            )
+            self.load(plan, 'follows', options['users'], self.save_follows)
+            self.reset_sequences()
+        finally:
+            with self.phase('search index'):
+                search.install()
+        with self.phase('counters'):
+            counters.reconcile()
+        with self.phase('timelines'):
+            timeline.rebuild()
+        self.stdout.write(self.style.SUCCESS('Data generated.'))
+
+    @contextmanager
+    def phase(self, name):
+        started = time.monotonic()
+        yield
+        self.stdout.write(f'{name}: {time.monotonic() - started:.1f} s')
+
+    def next_id(self, model):
+        return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+    def create_users(self, plan):
+        prefix = self.options['prefix']
+        chunk_size = self.options['chunk_size']
+        joined = connection.ops.adapt_datetimefield_value(plan['joined'])
+        fields = (
+            'id', 'username', 'password', 'first_name', 'last_name',
+            'email', 'is_staff', 'is_active', 'is_superuser', 'date_joined'
+        )
+        with self.phase(f'{plan["users"]} users'):
+            for start in range(0, plan['users'], chunk_size):
+                end = min(start + chunk_size, plan['users'])
+                self.insert(User, fields, [
+                    (
+                        plan['user_base'] + index,
+                        f'{prefix}{plan["user_base"] + index}',
+                        '!', '', '', '', False, True, False, joined
+                    ) for index in range(start, end)
+                ])
+
+    def create_groups(self, faker):
+        prefix = self.options['prefix']
+        first = self.next_id(Group)
+        Group.objects.bulk_create(
+            Group(
+                title=faker.sentence(nb_words=3),
+                slug=f'{prefix}-{first + index}',
+                description=faker.paragraph(),
+            ) for index in range(self.options['groups'])
+        )
+        return list(Group.objects.order_by('pk').values_list('pk', flat=True))
+
+    def load(self, plan, kind, total, save):
+        """Build the rows in chunks, in parallel if asked, and save them."""
+        chunk_size = self.options['chunk_size']
+        if kind == 'follows':
+            chunk_size = max(1, chunk_size // max(
+                1, round(plan['follows_per_user'])
+            ))
+        tasks = (
+            (kind, start, min(start + chunk_size, total))
+            for start in range(0, total, chunk_size)
+        )
+        rows = 0
+        with self.phase(kind):
+            if self.options['workers'] > 0:
+                context = multiprocessing.get_context('spawn')
+                with context.Pool(
+                    self.options['workers'],
+                    initializer=synthetic.init,
+                    initargs=(plan,)
+                ) as pool:
+                    for chunk in pool.imap(synthetic.build, tasks):
+                        rows += save(chunk)
+            else:
+                synthetic.init(plan)
+                for task in tasks:
+                    rows += save(synthetic.build(task))
+            self.stdout.write(f'{kind}: {rows} rows')
+
+    def insert(self, model, fields, rows):
+        """Insert the rows of a chunk with a single executemany."""
+        columns = ', '.join(
+            connection.ops.quote_name(model._meta.get_field(field).column)
+            for field in fields
+        )
+        placeholders = ', '.join(['%s'] * len(fields))
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f'INSERT INTO {model._meta.db_table} ({columns}) '
+                f'VALUES ({placeholders})',
+                rows
+            )
+        return len(rows)
+
+    def save_posts(self, rows):
+        adapt = connection.ops.adapt_datetimefield_value
+        return self.insert(
+            Post,
+            (
+                'id', 'text', 'author', 'group', 'created', 'image',
+                'comments_count'
+            ),
+            [
+                (post_id, text, author_id, group_id, adapt(created), '', 0)
+                for post_id, text, author_id, group_id, created in rows
+            ]
+        )
+
+    def save_comments(self, rows):
+        adapt = connection.ops.adapt_datetimefield_value
+        return self.insert(
+            Comment,
+            ('text', 'author', 'post', 'created'),
+            [
+                (text, author_id, post_id, adapt(created))
+                for text, author_id, post_id, created in rows
+            ]
+        )
+
+    def save_follows(self, rows):
+        return self.insert(Follow, ('user', 'author'), rows)
+
+    def reset_sequences(self):
+        """Move the id sequences past the ids set here."""
+        statements = connection.ops.sequence_reset_sql(
+            no_style(), [User, Post]
+        )
+        with connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
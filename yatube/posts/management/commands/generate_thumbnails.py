@@ -0,0 +1,60 @@
+from concurrent.futures import FIRST_COMPLETED, wait
+from itertools import chain, islice
+
+from django.core.management.base import BaseCommand
+
+from posts import shards, thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Render the thumbnails of all post images in parallel.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Number of worker processes.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=20,
+            help='Number of images sent to a worker at once.',
+        )
+
+    def handle(self, *args, **options):
+        names = chain.from_iterable(
+            Post.objects.using(using).exclude(image='')
+            .values_list('image', flat=True)
+            .iterator()
+            for using in shards.databases()
+        )
+        chunks = iter(
+            lambda: list(islice(names, options['chunk_size'])), []
+        )
+        # Two chunks per worker keep the workers busy while the names
+        # are read only as fast as they are rendered.
+        limit = 2 * options['workers']
+        pending = {}
+        self.done = self.failed = 0
+        with thumbnails.get_executor(options['workers']) as executor:
+            for chunk in chunks:
+                if len(pending) >= limit:
+                    finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    self.collect(pending, finished)
+                future = executor.submit(thumbnails.generate_chunk, chunk)
+                pending[future] = len(chunk)
+            self.collect(pending, list(pending))
+        self.stdout.write(self.style.SUCCESS(
+            f'Thumbnails rendered for {self.done} images, '
+            f'failed: {self.failed}.'
+        ))
+
+    def collect(self, pending, finished):
+        """Count the results of the finished chunks."""
+        for future in finished:
+            rendered = future.result()
+            self.done += rendered
+            self.failed += pending.pop(future) - rendered
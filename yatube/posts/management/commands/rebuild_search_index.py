@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text index of posts.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database',
+            default='default',
+            help='Database alias to rebuild the index in.',
+        )
+
+    def handle(self, *args, **options):
+        using = options['database']
+        if not search.is_available(using):
+            raise CommandError('Full-text index needs an SQLite database.')
+        search.install(using)
+        search.rebuild(using)
+        self.stdout.write(self.style.SUCCESS('Search index rebuilt.'))
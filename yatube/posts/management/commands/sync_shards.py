@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import shards
+
+
+class Command(BaseCommand):
+    help = 'Copy all users and groups to the shards of posts.'
+
+    def handle(self, *args, **options):
+        if not shards.enabled():
+            raise CommandError('POST_SHARDS is empty.')
+        shards.mirror_all()
+        self.stdout.write(self.style.SUCCESS('Shards synced.'))
@@ -0,0 +1,149 @@
+import re
+
+from django.db import connection, connections
+from django.db.models import Q
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .models import Post, User
+
+FTS_TABLE = 'posts_post_fts'
+MARK_START = '\x02'
+MARK_END = '\x03'
+
+
+def _statements():
+    """Return SQL creating the index table and its sync triggers."""
+    post_table = Post._meta.db_table
+    user_table = User._meta.db_table
+    insert = (
+        f'INSERT INTO {FTS_TABLE}(rowid, text, username) '
+        f'SELECT new.id, new.text, username FROM {user_table} '
+        f'WHERE id = new.author_id;'
+    )
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        f"text, username, tokenize='unicode61 remove_diacritics 2')",
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert '
+        f'AFTER INSERT ON {post_table} BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update '
+        f'AFTER UPDATE OF text, author_id ON {post_table} BEGIN '
+        f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete '
+        f'AFTER DELETE ON {post_table} BEGIN '
+        f'DELETE FROM {FTS_TABLE} WHERE rowid = old.id; END',
+        f'CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_username '
+        f'AFTER UPDATE OF username ON {user_table} BEGIN '
+        f'UPDATE {FTS_TABLE} SET username = new.username WHERE rowid IN '
+        f'(SELECT id FROM {post_table} WHERE author_id = new.id); END',
+    ]
+
+
+def is_available(using='default'):
+    """Whether the full-text index can be used on the database."""
+    return connections[using].vendor == 'sqlite'
+
+
+def install(using='default'):
+    """Create the index and its triggers, filling a new index."""
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM sqlite_master WHERE type = %s AND name = %s',
+            ['table', FTS_TABLE]
+        )
+        exists = cursor.fetchone() is not None
+        for statement in _statements():
+            cursor.execute(statement)
+    if not exists:
+        rebuild(using)
+
+
+def uninstall(using='default'):
+    """Drop the index and its triggers, e.g. before a bulk load."""
+    if not is_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        for suffix in ('insert', 'update', 'delete', 'username'):
+            cursor.execute(f'DROP TRIGGER IF EXISTS {FTS_TABLE}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+
+
+def rebuild(using='default'):
+    """Fill the index from scratch and merge its segments."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE}')
+        cursor.execute(
+            f'INSERT INTO {FTS_TABLE}(rowid, text, username) '
+            f'SELECT post.id, post.text, author.username '
+            f'FROM {Post._meta.db_table} post '
+            f'JOIN {User._meta.db_table} author '
+            f'ON author.id = post.author_id'
+        )
+        cursor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"
+        )
+
+
+def match_expression(query):
+    """Turn user input into a safe FTS5 prefix query."""
+    words = re.findall(r'\w+', query or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _match(queryset, expression, **extra):
+    post_table = Post._meta.db_table
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[
+            f'{FTS_TABLE}.rowid = {post_table}.id',
+            f'{FTS_TABLE} MATCH %s',
+        ],
+        params=[expression],
+        **extra
+    )
+
+
+def filter_posts(queryset, query):
+    """Narrow the posts to the ones matching the query, keeping the order."""
+    expression = match_expression(query)
+    if not expression:
+        return queryset.none()
+    if not is_available(queryset.db):
+        return queryset.filter(
+            Q(text__icontains=query) | Q(author__username__icontains=query)
+        )
+    return _match(queryset, expression)
+
+
+def search_posts(query):
+    """Return posts matching the query, the most relevant first."""
+    expression = match_expression(query)
+    if not expression:
+        return Post.objects.none()
+    if not is_available(connection.alias):
+        return Post.objects.filter(
+            Q(text__icontains=query) | Q(author__username__icontains=query)
+        )
+    return _match(
+        Post.objects.all(),
+        expression,
+        select={
+            'rank': f'bm25({FTS_TABLE}, 1.0, 0.5)',
+            'snippet': (
+                f"snippet({FTS_TABLE}, 0, '{MARK_START}', '{MARK_END}', "
+                f"'…', 24)"
+            ),
+        },
+        order_by=['rank', '-created'],
+    )
+
+
+def highlight(snippet):
+    """Return the snippet as HTML with the matches marked."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
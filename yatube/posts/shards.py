@@ -0,0 +1,267 @@
+"""Posts and comments spread over several databases by author.
+
+The posts of an author and the comments under them are kept in one of
+the POST_SHARDS databases picked by the hash of the author id. The id of
+a post carries the position of its shard, so a post is found by its id
+alone. Users and groups are copied to every shard, so posts are joined
+with their authors and groups where they are stored.
+
+Without POST_SHARDS everything stays in the default database and the
+helpers here return the querysets they get.
+"""
+import functools
+import zlib
+from itertools import chain
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+from core import replicas
+
+from .models import Comment, Group, Post, PostSequence, User
+
+SHARDED_MODELS = (Post, Comment, PostSequence)
+# Fields of the users copied to the shards, the rest are left empty.
+USER_FIELDS = ('username', 'first_name', 'last_name', 'is_active')
+GROUP_FIELDS = ('title', 'slug', 'description')
+
+
+def enabled():
+    return bool(settings.POST_SHARDS)
+
+
+def databases():
+    """Return the aliases of the databases keeping posts."""
+    return list(settings.POST_SHARDS) or [DEFAULT_DB_ALIAS]
+
+
+def database_for_author(author_id):
+    shards = settings.POST_SHARDS
+    return shards[zlib.crc32(str(author_id).encode()) % len(shards)]
+
+
+def database_for_post(post_id):
+    """Return the shard of the post, None for an id of no shard."""
+    slot = int(post_id) % settings.POST_SHARD_SLOTS
+    if slot >= len(settings.POST_SHARDS):
+        return None
+    return settings.POST_SHARDS[slot]
+
+
+def for_author(queryset, author_id):
+    """Send the queryset to the shard of the author."""
+    if not enabled():
+        return queryset
+    return queryset.using(database_for_author(author_id))
+
+
+def for_post(queryset, post_id):
+    """Send the queryset to the shard of the post."""
+    if not enabled():
+        return queryset
+    using = database_for_post(post_id)
+    if using is None:
+        return queryset.none()
+    return queryset.using(using)
+
+
+def scatter(queryset):
+    """Run the queryset on every shard, merging the rows in its order."""
+    if not enabled():
+        return queryset
+    return Scatter([queryset.using(using) for using in databases()])
+
+
+def number(post, using):
+    """Give a new post an id carrying the position of its shard."""
+    sequence = PostSequence.objects.using(using).create()
+    PostSequence.objects.using(using).filter(pk=sequence.pk).delete()
+    post.pk = (
+        sequence.pk * settings.POST_SHARD_SLOTS
+        + settings.POST_SHARDS.index(using)
+    )
+
+
+def _ordering(queryset):
+    query = queryset.query
+    if query.extra_order_by:
+        return list(query.extra_order_by)
+    if query.order_by:
+        return list(query.order_by)
+    if query.default_ordering:
+        return list(query.get_meta().ordering)
+    return []
+
+
+def _compare(ordering, first, second):
+    for field in ordering:
+        descending = field.startswith('-')
+        name = field.lstrip('-')
+        left, right = getattr(first, name), getattr(second, name)
+        if left == right:
+            continue
+        if left is None or right is None:
+            before = left is None
+        else:
+            before = left < right
+        return (1 if before else -1) if descending else (
+            -1 if before else 1
+        )
+    return 0
+
+
+class Scatter:
+    """Querysets of the shards read as one, in the order of the first one.
+
+    Supports what the paginators use: chaining, count() and slices.
+    """
+    ordered = True
+
+    def __init__(self, querysets):
+        self.querysets = querysets
+
+    def __repr__(self):
+        return f'<Scatter of {len(self.querysets)} shards>'
+
+    def _chain(self, method, *args, **kwargs):
+        return Scatter([
+            getattr(queryset, method)(*args, **kwargs)
+            for queryset in self.querysets
+        ])
+
+    def filter(self, *args, **kwargs):
+        return self._chain('filter', *args, **kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._chain('exclude', *args, **kwargs)
+
+    def order_by(self, *fields):
+        return self._chain('order_by', *fields)
+
+    def select_related(self, *fields):
+        return self._chain('select_related', *fields)
+
+    def only(self, *fields):
+        return self._chain('only', *fields)
+
+    def count(self):
+        return sum(queryset.count() for queryset in self.querysets)
+
+    def __len__(self):
+        return self.count()
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def __getitem__(self, index):
+        """Read the first rows of every shard and merge them.
+
+        A shard gives at most stop rows, deep pages read more of them.
+        """
+        if not isinstance(index, slice):
+            rows = self[index:index + 1]
+            if not rows:
+                raise IndexError('Scatter index out of range')
+            return rows[0]
+        if index.step is not None:
+            raise ValueError('Slices of shards have no step.')
+        start = index.start or 0
+        stop = index.stop
+        ordering = _ordering(self.querysets[0])
+        rows = chain.from_iterable(
+            queryset if stop is None else queryset[:stop]
+            for queryset in self.querysets
+        )
+        rows = sorted(
+            rows,
+            key=functools.cmp_to_key(
+                functools.partial(_compare, ordering)
+            )
+        )
+        return rows[start:stop]
+
+
+def _copy(model, instance, fields, **extra):
+    values = {field: getattr(instance, field) for field in fields}
+    values.update(extra)
+    for using in settings.POST_SHARDS:
+        copies = model.objects.using(using)
+        if not copies.filter(pk=instance.pk).update(**values):
+            copies.bulk_create([model(pk=instance.pk, **values)])
+
+
+def mirror(instance):
+    """Copy the user or group to every shard, without sending signals."""
+    if isinstance(instance, User):
+        _copy(
+            User, instance, USER_FIELDS,
+            password='!', date_joined=instance.date_joined
+        )
+    elif isinstance(instance, Group):
+        _copy(Group, instance, GROUP_FIELDS)
+
+
+def unmirror(instance):
+    """Delete the copies of the user or group with their posts."""
+    for using in settings.POST_SHARDS:
+        type(instance).objects.using(using).filter(pk=instance.pk).delete()
+
+
+def mirror_all():
+    """Copy all users and groups to the shards, e.g. after adding them."""
+    for model in (User, Group):
+        for instance in model.objects.using(DEFAULT_DB_ALIAS).iterator():
+            mirror(instance)
+
+
+class ShardRouter:
+    """Send posts and comments to their shards.
+
+    Other models read for a post of a shard come from the default
+    database or its replica, never from the copies on the shard.
+    """
+
+    def shard(self, model, hints):
+        instance = hints.get('instance')
+        if isinstance(instance, Post):
+            if instance.pk is not None:
+                return database_for_post(instance.pk)
+            if instance.author_id is not None:
+                return database_for_author(instance.author_id)
+        elif isinstance(instance, Comment):
+            if instance.post_id is not None:
+                return database_for_post(instance.post_id)
+        elif isinstance(instance, User) and model is Post:
+            return database_for_author(instance.pk)
+        return None
+
+    def db_for_read(self, model, **hints):
+        if not enabled():
+            return None
+        if model in SHARDED_MODELS:
+            return self.shard(model, hints) or DEFAULT_DB_ALIAS
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.POST_SHARDS):
+            return replicas.current() or DEFAULT_DB_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        if not enabled():
+            return None
+        if model in SHARDED_MODELS:
+            replicas.pin()
+            return self.shard(model, hints)
+        instance = hints.get('instance')
+        if (instance is not None
+                and instance._state.db in settings.POST_SHARDS):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        if not enabled():
+            return None
+        databases = {DEFAULT_DB_ALIAS, *settings.POST_SHARDS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -0,0 +1,118 @@
+from django.db import transaction
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.caching import bump, generation_key
+from . import counters, follows, search, shards, thumbnails, timeline
+from .models import Comment, Follow, Group, Post, User, UserStats
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, created, raw=False, **kwargs):
+    """Start the counters of a new user, refresh the pages of an old one."""
+    if created and not raw:
+        UserStats.objects.get_or_create(user=instance)
+    elif set(kwargs.get('update_fields') or ()) != {'last_login'}:
+        bump(
+            generation_key('author', instance.pk),
+            generation_key('user', instance.pk),
+            generation_key('feed')
+        )
+    if shards.enabled():
+        shards.mirror(instance)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    """Refresh the pages and cards that show the group."""
+    bump(
+        generation_key('group', instance.pk),
+        generation_key('groups'),
+        generation_key('feed')
+    )
+    if shards.enabled():
+        shards.mirror(instance)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def mirrored_deleted(sender, instance, using, **kwargs):
+    """Delete the copies of a user or group on the shards."""
+    if shards.enabled() and using not in settings.POST_SHARDS:
+        shards.unmirror(instance)
+
+
+@receiver(pre_save, sender=Post)
+def post_numbered(sender, instance, using, raw=False, **kwargs):
+    """Give a new post of a shard an id pointing at the shard."""
+    if shards.enabled() and instance.pk is None and not raw:
+        shards.number(instance, using)
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw=False, **kwargs):
+    """Count and fan out a new post, refresh the pages that show it."""
+    if created and not raw:
+        counters.increment(instance.author_id, 'posts_count')
+        timeline.fan_out(instance)
+    if instance.image and not raw:
+        name = instance.image.name
+        transaction.on_commit(lambda: thumbnails.schedule(name))
+    bump(
+        generation_key('post', instance.pk),
+        generation_key('user', instance.author_id),
+        generation_key('feed')
+    )
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Uncount a deleted post and refresh the pages that showed it."""
+    counters.decrement(instance.author_id, 'posts_count')
+    bump(
+        generation_key('post', instance.pk),
+        generation_key('user', instance.author_id),
+        generation_key('feed')
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, raw=False, **kwargs):
+    """Count a new comment and refresh the post."""
+    if created and not raw:
+        counters.change_comments(instance.post_id, 1)
+    bump(generation_key('post', instance.post_id), generation_key('feed'))
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """Uncount a deleted comment and refresh the post."""
+    counters.change_comments(instance.post_id, -1)
+    bump(generation_key('post', instance.post_id), generation_key('feed'))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, raw=False, **kwargs):
+    """Count the subscription and backfill the follower's feed."""
+    if created and not raw:
+        counters.increment(instance.author_id, 'followers_count')
+        counters.increment(instance.user_id, 'following_count')
+        follows.changed(instance.user_id, instance.author_id)
+        timeline.follow(instance.user_id, instance.author_id)
+    bump(generation_key('user', instance.author_id))
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    """Uncount the subscription and clean the follower's feed."""
+    counters.decrement(instance.author_id, 'followers_count')
+    counters.decrement(instance.user_id, 'following_count')
+    followers = follows.changed(instance.user_id, instance.author_id)
+    timeline.unfollow(instance.user_id, instance.author_id, followers)
+    bump(generation_key('user', instance.author_id))
+
+
+def install_search_index(sender, using, **kwargs):
+    """Keep the full-text index and its triggers in place after migrate."""
+    search.install(using)
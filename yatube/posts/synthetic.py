@@ -0,0 +1,119 @@
+"""Rows of synthetic users' activity shaped like the real one.
+
+The module does not use Django, so worker processes can build rows
+without setting the project up. Every chunk has its own seed, the rows
+do not depend on the number of workers.
+"""
+import random
+from datetime import timedelta
+
+_plan = None
+
+
+def init(plan):
+    """Remember the plan in a worker process."""
+    global _plan
+    _plan = plan
+
+
+def zipf_rank(rng, count, exponent):
+    """Return a rank in [0, count), low ranks being the most frequent."""
+    power = 1 - exponent
+    value = rng.random()
+    if power == 0:
+        rank = (count + 1) ** value
+    else:
+        rank = (((count + 1) ** power - 1) * value + 1) ** (1 / power)
+    return min(int(rank) - 1, count - 1)
+
+
+def text(rng, vocabulary, low, high):
+    words = rng.choices(vocabulary, k=rng.randint(low, high))
+    return ' '.join(words).capitalize() + '.'
+
+
+def post_created(plan, index):
+    """Posts are spread evenly over the period, newer ones get higher ids."""
+    return plan['start'] + timedelta(
+        seconds=plan['span'] * index / max(plan['posts'], 1)
+    )
+
+
+def posts(plan, rng, start, end):
+    rows = []
+    for index in range(start, end):
+        group_id = None
+        if plan['group_ids'] and rng.random() < plan['grouped']:
+            group_id = plan['group_ids'][
+                zipf_rank(rng, len(plan['group_ids']), plan['exponent'])
+            ]
+        rows.append((
+            plan['post_base'] + index,
+            text(rng, plan['vocabulary'], 5, 60),
+            plan['user_base'] + zipf_rank(
+                rng, plan['users'], plan['exponent']
+            ),
+            group_id,
+            post_created(plan, index),
+        ))
+    return rows
+
+
+def comments(plan, rng, start, end):
+    """Comments go mostly to the newest posts and come from active users."""
+    rows = []
+    end_time = plan['start'] + timedelta(seconds=plan['span'])
+    for _ in range(start, end):
+        index = plan['posts'] - 1 - zipf_rank(
+            rng, plan['posts'], plan['exponent']
+        )
+        created = post_created(plan, index) + timedelta(
+            seconds=rng.expovariate(1 / plan['comment_delay'])
+        )
+        rows.append((
+            text(rng, plan['vocabulary'], 2, 25),
+            plan['user_base'] + zipf_rank(
+                rng, plan['users'], plan['exponent']
+            ),
+            plan['post_base'] + index,
+            min(created, end_time),
+        ))
+    return rows
+
+
+def follows(plan, rng, start, end):
+    """Every user follows a few authors, popular ones more often."""
+    rows = []
+    if plan['follows_per_user'] <= 0:
+        return rows
+    limit = plan['users'] - 1
+    for index in range(start, end):
+        wanted = min(
+            limit, round(rng.expovariate(1 / plan['follows_per_user']))
+        )
+        authors = set()
+        for _ in range(wanted * 3):
+            if len(authors) >= wanted:
+                break
+            author = zipf_rank(rng, plan['users'], plan['exponent'])
+            if author != index:
+                authors.add(author)
+        rows.extend(
+            (plan['user_base'] + index, plan['user_base'] + author)
+            for author in sorted(authors)
+        )
+    return rows
+
+
+BUILDERS = {
+    'posts': posts,
+    'comments': comments,
+    'follows': follows,
+}
+
+
+def build(task):
+    """Return the rows of the (kind, start, end) chunk."""
+    kind, start, end = task
+    rng = random.Random(f'{_plan["seed"]}:{kind}:{start}')
+    return BUILDERS[kind](_plan, rng, start, end)
@@ -0,0 +1,11 @@
+from django import template
+
+from posts.cards import LazyCards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Return cards of the posts, rendered as they are iterated over."""
+    return LazyCards(posts)
@@ -0,0 +1,117 @@
+from unittest import skipUnless
+
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core import sqlite
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            'admin', 'admin@example.com', 'password'
+        )
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Кошки', slug='cats', description='Про кошек'
+        )
+        cls.other_group = Group.objects.create(
+            title='Собаки', slug='dogs', description='Про собак'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def create_rows(self, total):
+        for number in range(total):
+            user = User.objects.create(username=f'user{User.objects.count()}')
+            post = Post.objects.create(
+                author=user, group=self.group, text=f'Пост про кошек {number}'
+            )
+            Comment.objects.create(post=post, author=self.author, text='Да')
+            Follow.objects.create(user=user, author=self.author)
+
+    def changelist_queries(self, model):
+        url = reverse(f'admin:posts_{model}_changelist')
+        # The first request caches the user of the session.
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get(url).status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        for model in ('post', 'comment', 'follow'):
+            with self.subTest(model=model):
+                self.create_rows(2)
+                few = self.changelist_queries(model)
+                self.create_rows(5)
+                self.assertEqual(self.changelist_queries(model), few)
+
+    def test_post_search_uses_words(self):
+        Post.objects.create(author=self.author, text='Рыжие кошки спят')
+        Post.objects.create(author=self.author, text='Собаки бегают')
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'кошки'}
+        )
+        self.assertContains(response, 'Рыжие кошки спят')
+        self.assertNotContains(response, 'Собаки бегают')
+
+    @skipUnless(connection.vendor == 'sqlite', 'Statistics of SQLite.')
+    def test_whole_tables_are_counted_from_statistics(self):
+        self.create_rows(3)
+        sqlite.optimize(analyze=True)
+        self.create_rows(2)
+        url = reverse('admin:posts_post_changelist')
+        with override_settings(PAGINATOR_CACHED_COUNT_FROM=1):
+            estimated = self.client.get(url)
+            filtered = self.client.get(
+                url, {'group__id__exact': self.group.pk}
+            )
+        self.assertEqual(estimated.context['cl'].result_count, 3)
+        self.assertEqual(filtered.context['cl'].result_count, 5)
+
+    def run_action(self, action, posts, **data):
+        return self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': action,
+                helpers.ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+                **data
+            },
+            follow=True
+        )
+
+    def test_posts_are_moved_between_groups(self):
+        self.create_rows(3)
+        posts = list(Post.objects.all()[:2])
+        self.run_action('move_to_group', posts, group=self.other_group.pk)
+        self.assertEqual(self.other_group.posts.count(), 2)
+        response = self.run_action('move_to_group', posts)
+        self.assertContains(response, 'Выберите группу.')
+        self.run_action('remove_from_group', posts)
+        self.assertEqual(Post.objects.filter(group=None).count(), 2)
+
+    def test_deleted_comments_are_counted(self):
+        self.create_rows(2)
+        response = self.client.post(
+            reverse('admin:posts_post_changelist'),
+            {
+                'action': 'delete_selected',
+                helpers.ACTION_CHECKBOX_NAME: list(
+                    Post.objects.values_list('pk', flat=True)
+                ),
+            }
+        )
+        self.assertEqual(
+            dict(response.context['model_count']),
+            {'Посты': 2, 'Комменты': 2}
+        )
@@ -0,0 +1,54 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from core.budgets import (QueryBudgetExceeded, QueryBudgetMiddleware,
+                          query_budget)
+
+User = get_user_model()
+
+
+@query_budget(1)
+def greedy_view(request):
+    """Run one query per user."""
+    for user in User.objects.all():
+        User.objects.filter(pk=user.pk).exists()
+    return HttpResponse()
+
+
+class QueryBudgetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        User.objects.create_user(username='first')
+        User.objects.create_user(username='second')
+
+    def get(self):
+        request = RequestFactory().get('/greedy/')
+        middleware = QueryBudgetMiddleware(
+            lambda request: middleware.process_view(
+                request, greedy_view, (), {}
+            ) or greedy_view(request)
+        )
+        return middleware(request)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_strict_budget_raises(self):
+        """Exceeded budget fails the request in strict mode."""
+        with self.assertRaisesMessage(QueryBudgetExceeded, '3 queries'):
+            self.get()
+
+    @override_settings(QUERY_BUDGET_STRICT=False)
+    def test_budget_is_logged(self):
+        """Exceeded budget is only reported outside of strict mode."""
+        with self.assertLogs('core.budgets', 'WARNING') as logs:
+            response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('1 duplicates', logs.output[0])
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_views_fit_their_budgets(self):
+        """Pages of the project stay within their budgets."""
+        for url in ('/', '/profile/first/', '/search/?q=first'):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 200)
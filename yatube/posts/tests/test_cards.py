@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from .. import cards
+from ..models import Group, Post
+
+User = get_user_model()
+
+
+@override_settings(PAGE_CACHE_TIMEOUT=0)
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Название',
+            slug='test-slug',
+            description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Текст',
+            group=cls.group
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        cache.clear()
+
+    def group_page(self):
+        return self.guest_client.get(
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'})
+        )
+
+    def test_cards_are_cached(self):
+        """The second render takes the card from the cache."""
+        self.group_page()
+        self.assertEqual(cards.stats(), (0, 1))
+        response = self.group_page()
+        self.assertEqual(cards.stats(), (1, 1))
+        self.assertContains(response, 'Текст')
+
+    def test_edit_refreshes_card(self):
+        """Editing the post invalidates its card."""
+        self.group_page()
+        post = Post.objects.get(pk=self.post.pk)
+        post.text = 'Новый текст'
+        post.save()
+        self.assertContains(self.group_page(), 'Новый текст')
+
+    def test_group_rename_refreshes_card(self):
+        """Renaming the group invalidates the cards of its posts."""
+        self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        group = Group.objects.get(pk=self.group.pk)
+        group.title = 'Другое название'
+        group.save()
+        response = self.guest_client.get(
+            reverse('posts:profile', kwargs={'username': 'author'})
+        )
+        self.assertContains(response, 'Другое название')
+        self.assertEqual(cards.stats(), (0, 2))
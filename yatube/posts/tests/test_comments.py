@@ -0,0 +1,59 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Post
+
+User = get_user_model()
+
+
+class CommentThreadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+        commenters = [
+            User.objects.create(username=f'user{i}') for i in range(3)
+        ]
+        Comment.objects.bulk_create(
+            [
+                Comment(
+                    post=cls.post,
+                    author=commenters[i % 3],
+                    text=f'Коммент {i}'
+                ) for i in range(settings.COMMENTS_NUM + 5)
+            ]
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+        cache.clear()
+
+    def test_comments_are_paged(self):
+        """Post page shows one page of comments, the rest is a fragment."""
+        response = self.authorized_client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        comments = response.context['comments']
+        self.assertEqual(len(comments), settings.COMMENTS_NUM)
+        self.assertTrue(comments.has_next())
+        response = self.authorized_client.get(
+            reverse('posts:comment_list', kwargs={'post_id': self.post.pk}),
+            {'after': comments.next_cursor}
+        )
+        self.assertTemplateUsed(response, 'posts/includes/comments.html')
+        self.assertTemplateNotUsed(response, 'base.html')
+        self.assertEqual(len(response.context['comments']), 5)
+        self.assertFalse(response.context['comments'].has_next())
+
+    def test_comment_authors_are_loaded_together(self):
+        """Number of queries does not depend on the number of comments."""
+        url = reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        self.authorized_client.get(url)
+        # The session and its user, the post and its comments.
+        with self.assertNumQueries(4):
+            self.authorized_client.get(url)
@@ -0,0 +1,103 @@
+from array import array
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import counters, follows
+from ..models import Follow
+
+User = get_user_model()
+
+
+class FollowSetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='reader')
+        cls.author = User.objects.create(username='author')
+        cls.other = User.objects.create(username='other')
+
+    def setUp(self):
+        cache.clear()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def test_set_follows_subscriptions(self):
+        """The cached set changes with follow and unfollow."""
+        self.assertFalse(follows.is_following(self.user.pk, self.author.pk))
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertTrue(follows.is_following(self.user.pk, self.author.pk))
+        self.assertEqual(list(follows.following_ids(self.user.pk)), [
+            self.author.pk
+        ])
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(follows.is_following(self.user.pk, self.author.pk))
+
+    def test_profile_does_not_query_follows(self):
+        """The follow button is drawn from the cached set."""
+        Follow.objects.create(user=self.user, author=self.author)
+        url = reverse('posts:profile', args=[self.author.username])
+        self.authorized_client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.authorized_client.get(url)
+        self.assertTrue(response.context['following'])
+        self.assertFalse(any(
+            'posts_follow' in query['sql']
+            for query in queries.captured_queries
+        ))
+
+    def test_unfollow_without_subscription(self):
+        """Unfollowing an author that is not followed changes nothing."""
+        response = self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertRedirects(
+            response, reverse('posts:profile', args=[self.author.username])
+        )
+
+    def test_stale_set_does_not_skip_writes(self):
+        """Follow and unfollow write even if the cached set says otherwise."""
+        stale = follows._following_key(self.user.pk)
+        cache.set(stale, array('q', [self.author.pk]).tobytes())
+        self.authorized_client.get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.assertTrue(
+            Follow.objects.filter(user=self.user, author=self.author).exists()
+        )
+        cache.set(stale, array('q').tobytes())
+        self.authorized_client.get(
+            reverse('posts:profile_unfollow', args=[self.author.username])
+        )
+        self.assertFalse(Follow.objects.exists())
+        self.assertFalse(follows.is_following(self.user.pk, self.author.pk))
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_reconcile_forgets_popular_authors(self):
+        """Authors counted popular by reconcile enter the popular set."""
+        self.assertEqual(list(follows.popular_ids()), [])
+        Follow.objects.bulk_create(
+            [Follow(user=self.user, author=self.author)]
+        )
+        counters.reconcile()
+        self.assertEqual(list(follows.popular_ids()), [self.author.pk])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2)
+    def test_popular_authors(self):
+        """Authors enter and leave the popular set with their followers."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(follows.popular_following_ids(self.user.pk), [])
+        Follow.objects.create(user=self.other, author=self.author)
+        self.assertEqual(
+            follows.popular_following_ids(self.user.pk), [self.author.pk]
+        )
+        Follow.objects.get(user=self.other).delete()
+        self.assertEqual(follows.popular_following_ids(self.user.pk), [])
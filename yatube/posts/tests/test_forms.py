@@ -1,3 +1,4 @@
+import io
 import shutil
 import tempfile
 
@@ -6,7 +7,9 @@ from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, override_settings, TestCase
 from django.urls import reverse
+from PIL import Image
 
+from ..forms import PostForm
 from ..models import Group, Post
 
 User = get_user_model()
@@ -136,3 +139,55 @@ class PostFormTests(TestCase):
             'posts:post_detail', kwargs={'post_id': f'{self.post.id}'}))
         comment = response.context['comments'][0]
         self.assertEqual(comment.text, 'Комментарий')
+
+
+@override_settings(IMAGE_MAX_SIZE=(100, 100))
+class ImageIngestionTests(TestCase):
+    def jpeg(self, size, exif=None):
+        buffer = io.BytesIO()
+        image = Image.new('RGB', size, 'red')
+        if exif is None:
+            image.save(buffer, 'JPEG')
+        else:
+            image.save(buffer, 'JPEG', exif=exif)
+        return SimpleUploadedFile(
+            name='photo.jpg',
+            content=buffer.getvalue(),
+            content_type='image/jpeg'
+        )
+
+    def clean_image(self, upload):
+        form = PostForm(data={'text': 'Текст'}, files={'image': upload})
+        form.is_valid()
+        return form
+
+    def test_big_image_is_shrunk_and_reencoded(self):
+        """Big images are capped and stored in the efficient format."""
+        form = self.clean_image(self.jpeg((400, 200)))
+        self.assertTrue(form.is_valid())
+        image = form.cleaned_data['image']
+        self.assertEqual(image.name, 'photo.webp')
+        with Image.open(image) as stored:
+            self.assertEqual(stored.format, 'WEBP')
+            self.assertEqual(stored.size, (100, 50))
+
+    def test_metadata_is_stripped(self):
+        """EXIF data is removed even from small images."""
+        exif = Image.Exif()
+        exif[0x010F] = 'Camera'
+        form = self.clean_image(self.jpeg((10, 10), exif=exif.tobytes()))
+        image = form.cleaned_data['image']
+        with Image.open(image) as stored:
+            self.assertNotIn('exif', stored.info)
+
+    def test_small_clean_image_is_kept(self):
+        """Small images without metadata are stored as they are."""
+        upload = self.jpeg((10, 10))
+        form = self.clean_image(upload)
+        self.assertIs(form.cleaned_data['image'], upload)
+
+    @override_settings(IMAGE_MAX_PIXELS=100)
+    def test_huge_image_is_rejected(self):
+        """Images with too many pixels are rejected before decoding."""
+        form = self.clean_image(self.jpeg((20, 20)))
+        self.assertIn('image', form.errors)
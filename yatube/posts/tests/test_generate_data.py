@@ -0,0 +1,73 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from .. import counters, synthetic
+from ..models import Comment, Follow, Post, Timeline, User
+from ..search import search_posts
+
+
+class GenerateDataTests(TestCase):
+    options = {
+        'users': 40,
+        'groups': 3,
+        'posts': 300,
+        'comments': 500,
+        'follows': 200,
+        'chunk_size': 70,
+        'seed': 7,
+    }
+
+    def generate(self, **options):
+        options = dict(self.options, **options)
+        call_command('generate_data', stdout=StringIO(), **options)
+
+    def test_rows_are_generated(self):
+        """Users, posts and comments are created in the asked numbers."""
+        self.generate()
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Post.objects.count(), 300)
+        self.assertEqual(Comment.objects.count(), 500)
+        self.assertGreater(Follow.objects.count(), 100)
+        post = Post.objects.create(author=User.objects.first(), text='Новый')
+        self.assertEqual(Post.objects.order_by('-pk').first(), post)
+
+    def test_activity_is_skewed(self):
+        """The most active author writes far more than the median one."""
+        self.generate()
+        counts = sorted(
+            User.objects.values_list('stats__posts_count', flat=True)
+        )
+        self.assertGreater(counts[-1], counts[len(counts) // 2] * 5)
+
+    def test_derived_data_is_consistent(self):
+        """Counters, feeds and the search index match the generated rows."""
+        self.generate()
+        self.assertEqual(counters.reconcile(), 0)
+        follow = Follow.objects.first()
+        self.assertTrue(
+            Timeline.objects.filter(
+                user_id=follow.user_id, author_id=follow.author_id
+            ).exists()
+            or not Post.objects.filter(author_id=follow.author_id).exists()
+        )
+        word = Post.objects.first().text.split()[0].strip('.')
+        self.assertTrue(search_posts(word).exists())
+
+    def test_rows_are_reproducible(self):
+        """The same seed gives the same rows, whatever the workers do."""
+        plan = {
+            'seed': 1, 'users': 10, 'posts': 20, 'exponent': 1.1,
+            'follows_per_user': 3, 'group_ids': [], 'user_base': 1,
+            'post_base': 1,
+        }
+        synthetic.init(plan)
+        first = synthetic.build(('follows', 0, 5))
+        synthetic.init(dict(plan))
+        self.assertEqual(synthetic.build(('follows', 0, 5)), first)
+
+    def test_workers(self):
+        """Rows built by worker processes are saved."""
+        self.generate(workers=2, comments=0, follows=0)
+        self.assertEqual(Post.objects.count(), 300)
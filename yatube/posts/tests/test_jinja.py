@@ -0,0 +1,133 @@
+import html
+import re
+import shutil
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils.html import strip_tags
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+LINK = re.compile(r'(?:href|src|action)="([^"]*)"')
+
+
+def page_text(content):
+    return html.unescape(' '.join(strip_tags(content).split()))
+
+
+@skipUnless('jinja2' in engines.templates, 'The jinja2 package is missing.')
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, PAGE_CACHE_TIMEOUT=0)
+class JinjaTemplateTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(
+            username='author', first_name='Лев', last_name='Толстой'
+        )
+        cls.user = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание "группы"'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        for number in range(12):
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group,
+                text=f'Кошки & <собаки> {number}\nвторая строка',
+            )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            group=cls.group,
+            text='Пост с картинкой',
+            image=SimpleUploadedFile('small.gif', small_gif, 'image/gif'),
+        )
+        Comment.objects.create(
+            post=cls.post, author=cls.user, text='Комментарий <b>'
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def render(self, client, name, kwargs, data, engine):
+        cache.clear()
+        with override_settings(TEMPLATE_ENGINES={name: engine}):
+            response = client.get(reverse(name, kwargs=kwargs), data)
+        self.assertEqual(response.status_code, 200)
+        if engine == 'jinja2':
+            # Form widgets are rendered by the Django form renderer.
+            self.assertEqual([
+                template.name for template in response.templates
+                if not template.name.startswith('django/forms/')
+            ], [])
+        return response.content.decode()
+
+    def test_pages_match_django_templates(self):
+        """Jinja2 pages show the same text and links as the Django ones."""
+        post_id = self.post.pk
+        pages = [
+            (self.guest_client, 'posts:index', {}, {}),
+            (self.authorized_client, 'posts:index', {}, {'page': 2}),
+            (self.guest_client, 'posts:group_list', {'slug': 'group'}, {}),
+            (self.authorized_client, 'posts:profile',
+             {'username': 'author'}, {}),
+            (self.author_client, 'posts:post_detail',
+             {'post_id': post_id}, {}),
+            (self.guest_client, 'posts:comment_list',
+             {'post_id': post_id}, {}),
+            (self.authorized_client, 'posts:follow_index', {}, {}),
+            (self.guest_client, 'posts:search_results', {}, {'q': 'кошки'}),
+            (self.authorized_client, 'posts:post_create', {}, {}),
+            (self.author_client, 'posts:edit', {'post_id': post_id}, {}),
+        ]
+        for client, name, kwargs, data in pages:
+            with self.subTest(view=name, data=data):
+                django = self.render(client, name, kwargs, data, 'django')
+                jinja = self.render(client, name, kwargs, data, 'jinja2')
+                self.assertEqual(page_text(jinja), page_text(django))
+                self.assertEqual(LINK.findall(jinja), LINK.findall(django))
+                self.assertNotIn('<собаки>', jinja)
+
+    def test_missing_engine_falls_back_to_django(self):
+        """An engine that is not configured leaves the Django templates."""
+        with override_settings(TEMPLATE_ENGINES={'posts:index': 'mako'}):
+            response = self.guest_client.get(reverse('posts:index'))
+        self.assertTemplateUsed(response, 'posts/index.html')
+
+    def test_benchmark_compares_engines(self):
+        """The benchmark reports the render time of both engines."""
+        out = StringIO()
+        call_command(
+            'benchmark_templates', renders=2, posts=3, stdout=out
+        )
+        output = out.getvalue()
+        self.assertIn('posts/index.html', output)
+        self.assertIn('jinja2', output)
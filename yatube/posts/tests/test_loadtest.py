@@ -0,0 +1,59 @@
+from django.test import SimpleTestCase
+
+from core import loadtest
+
+
+def hello(environ, start_response):
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'hello']
+
+
+class LoadTestTests(SimpleTestCase):
+    def test_percentile(self):
+        """Percentiles interpolate between the closest ranks."""
+        values = list(range(1, 101))
+        self.assertEqual(loadtest.percentile(values, 50), 50.5)
+        self.assertAlmostEqual(loadtest.percentile(values, 99), 99.01)
+        self.assertEqual(loadtest.percentile([3], 95), 3)
+        self.assertIsNone(loadtest.percentile([], 50))
+
+    def test_summarize(self):
+        """Errors, throughput and queries are reported per route."""
+        result = loadtest.summarize(
+            [0.01, 0.02, 0.03, 0.04], [200, 302, 404, None], 0.5, [2, 4]
+        )
+        self.assertEqual(result['requests'], 4)
+        self.assertEqual(result['errors'], 2)
+        self.assertEqual(result['p50_ms'], 25)
+        self.assertEqual(result['rps'], 8)
+        self.assertEqual(result['queries'], 3)
+
+    def test_compare(self):
+        """Slower routes and new queries are regressions."""
+        base = {
+            'requests': 10, 'errors': 0, 'p95_ms': 10.0,
+            'rps': 100.0, 'queries': 3.0,
+        }
+        routes = {
+            'same': dict(base),
+            'slow': dict(base, p95_ms=13.0, rps=70.0),
+            'greedy': dict(base, queries=4.0),
+            'new': dict(base),
+        }
+        baseline = {name: base for name in ('same', 'slow', 'greedy')}
+        regressions = loadtest.compare(routes, baseline, 0.2)
+        self.assertEqual(len(regressions), 3)
+        self.assertTrue(regressions[0].startswith('slow: p95'))
+        self.assertTrue(regressions[2].startswith('greedy: 4.0 queries'))
+
+    def test_server(self):
+        """Requests reach the application through the local server."""
+        application = loadtest.QueryCountingApplication(hello)
+        request = loadtest.Request('GET', '/', None, {})
+        with loadtest.Server(application) as server:
+            latencies, statuses, elapsed = loadtest.run(
+                server.address, [[request] * 3, [request] * 2]
+            )
+        self.assertEqual(statuses, [200] * 5)
+        self.assertEqual(len(latencies), 5)
+        self.assertEqual(application.queries, [0] * 5)
@@ -0,0 +1,151 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.conf import settings
+from django.core import mail
+from django.core.mail import EmailMultiAlternatives
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from core.mail import claim, deliver, retry_delay
+from core.models import OutgoingEmail
+
+TEMP_EMAIL_PATH = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class FlakyBackend(BaseEmailBackend):
+    """Backend that counts connections and rejects some addresses."""
+    opened = 0
+    sent = []
+
+    def open(self):
+        FlakyBackend.opened += 1
+        return True
+
+    def send_messages(self, email_messages):
+        for message in email_messages:
+            if 'broken@example.com' in message.to:
+                raise OSError('Mailbox is unavailable')
+            FlakyBackend.sent.append(message)
+        return len(email_messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxBackend',
+    OUTBOX_EMAIL_BACKEND='posts.tests.test_outbox.FlakyBackend',
+    EMAIL_FILE_PATH=TEMP_EMAIL_PATH,
+)
+class OutboxTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_EMAIL_PATH, ignore_errors=True)
+
+    def setUp(self):
+        FlakyBackend.opened = 0
+        FlakyBackend.sent = []
+
+    def queue(self, *recipients):
+        for recipient in recipients:
+            mail.send_mail('Тема', 'Текст', None, [recipient])
+
+    def test_sending_only_queues(self):
+        """Nothing is sent while the request runs."""
+        self.queue('one@example.com')
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.subject, 'Тема')
+        self.assertEqual(email.recipients, 'one@example.com')
+        self.assertEqual(FlakyBackend.sent, [])
+
+    def test_message_is_built_again(self):
+        """The queued fields give back the message with its HTML version."""
+        message = EmailMultiAlternatives(
+            'Тема', 'Текст', 'from@example.com', ['one@example.com'],
+            cc=['two@example.com'], headers={'X-Tag': 'follow'}
+        )
+        message.attach_alternative('<p>Текст</p>', 'text/html')
+        message.send()
+        deliver()
+        sent, = FlakyBackend.sent
+        self.assertEqual(sent.subject, 'Тема')
+        self.assertEqual(sent.from_email, 'from@example.com')
+        self.assertEqual(sent.cc, ['two@example.com'])
+        self.assertEqual(sent.extra_headers, {'X-Tag': 'follow'})
+        self.assertEqual(sent.alternatives, [('<p>Текст</p>', 'text/html')])
+
+    def test_claimed_emails_are_not_taken_again(self):
+        """A second worker skips the emails another one is sending."""
+        self.queue('one@example.com', 'two@example.com')
+        first = claim(batch_size=1)
+        self.assertEqual(len(first), 1)
+        second = claim(batch_size=10)
+        self.assertEqual(
+            [email.recipients for email in second], ['two@example.com']
+        )
+        self.assertEqual(claim(batch_size=10), [])
+        self.assertNotEqual(first[0].claim, second[0].claim)
+
+    def test_batch_reuses_connection(self):
+        """A batch goes over one connection and leaves the outbox."""
+        self.queue('one@example.com', 'two@example.com', 'three@example.com')
+        self.assertEqual(deliver(batch_size=2), (2, 0))
+        self.assertEqual(deliver(batch_size=2), (1, 0))
+        self.assertEqual(FlakyBackend.opened, 2)
+        self.assertEqual(
+            [message.to for message in FlakyBackend.sent],
+            [['one@example.com'], ['two@example.com'], ['three@example.com']]
+        )
+        self.assertFalse(OutgoingEmail.objects.exists())
+
+    def test_failed_email_is_retried_later(self):
+        self.queue('broken@example.com', 'one@example.com')
+        before = timezone.now()
+        self.assertEqual(deliver(), (1, 1))
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.attempts, 1)
+        self.assertEqual(email.error, 'Mailbox is unavailable')
+        self.assertGreaterEqual(email.send_after, before + retry_delay(1))
+        self.assertEqual(deliver(), (0, 0))
+
+    def test_retry_delay_doubles(self):
+        self.assertEqual(
+            retry_delay(2), timedelta(seconds=settings.OUTBOX_RETRY_DELAY * 2)
+        )
+        self.assertEqual(
+            retry_delay(30),
+            timedelta(seconds=settings.OUTBOX_RETRY_MAX_DELAY)
+        )
+
+    def test_gives_up_after_max_attempts(self):
+        self.queue('broken@example.com')
+        OutgoingEmail.objects.update(
+            attempts=settings.OUTBOX_MAX_ATTEMPTS - 1
+        )
+        with self.assertLogs('core.mail', 'ERROR'):
+            deliver()
+        OutgoingEmail.objects.update(send_after=timezone.now())
+        self.assertEqual(deliver(), (0, 0))
+
+    @override_settings(
+        OUTBOX_EMAIL_BACKEND=(
+            'django.core.mail.backends.filebased.EmailBackend'
+        )
+    )
+    def test_worker_command_writes_files(self):
+        """The worker sends the outbox through the file-based backend."""
+        self.queue('one@example.com', 'two@example.com')
+        out = StringIO()
+        call_command('send_outbox', once=True, stdout=out)
+        self.assertIn('Sent 2 emails', out.getvalue())
+        content = ''.join(
+            open(os.path.join(TEMP_EMAIL_PATH, name)).read()
+            for name in os.listdir(TEMP_EMAIL_PATH)
+        )
+        self.assertIn('To: one@example.com', content)
+        self.assertIn('To: two@example.com', content)
+        self.assertFalse(OutgoingEmail.objects.exists())
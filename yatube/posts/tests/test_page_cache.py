@@ -0,0 +1,107 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, override_settings, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class AnonymousPageCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='NoName')
+        cls.author = User.objects.create(username='author')
+        cls.group = Group.objects.create(
+            title='Название',
+            slug='test-slug',
+            description='Описание'
+        )
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Текст',
+            group=cls.group
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def assertCached(self, url):
+        self.guest_client.get(url)
+        response = self.guest_client.get(url)
+        self.assertEqual(response.get('X-Page-Cache'), 'hit')
+
+    def assertNotCached(self, url):
+        response = self.guest_client.get(url)
+        self.assertIsNone(response.get('X-Page-Cache'))
+
+    def test_anonymous_pages_are_cached(self):
+        """Anonymous pages are served from the cache."""
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'test-slug'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertCached(url)
+
+    def test_authorized_pages_are_not_cached(self):
+        """Pages of logged in users are rendered every time."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        self.authorized_client.get(url)
+        response = self.authorized_client.get(url)
+        self.assertIsNone(response.get('X-Page-Cache'))
+
+    def test_writes_invalidate_pages(self):
+        """Posts, comments, groups and follows invalidate their pages."""
+        detail_url = reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}
+        )
+        profile_url = reverse('posts:profile', kwargs={'username': 'author'})
+        index_url = reverse('posts:index')
+        writes = (
+            (detail_url, lambda: Comment.objects.create(
+                post=self.post, author=self.user, text='Коммент'
+            )),
+            (profile_url, lambda: Follow.objects.create(
+                user=self.user, author=self.author
+            )),
+            (index_url, lambda: Post.objects.create(
+                author=self.user, text='Новый'
+            )),
+            (detail_url, lambda: Group.objects.filter(
+                pk=self.group.pk
+            ).first().save()),
+        )
+        for url, write in writes:
+            with self.subTest(url=url):
+                self.assertCached(url)
+                write()
+                self.assertNotCached(url)
+
+    def test_stale_page_is_served_while_another_request_renders(self):
+        """Requests that miss a locked page get the stale copy."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        Post.objects.create(author=self.author, text='Новый пост')
+        with mock.patch('core.caching.cache.add', return_value=False):
+            response = self.guest_client.get(url)
+        self.assertEqual(response.get('X-Page-Cache'), 'hit')
+        self.assertNotContains(response, 'Новый пост')
+
+    @override_settings(PAGE_CACHE_LOCK_WAIT=1)
+    def test_locked_cold_page_is_rendered_after_waiting(self):
+        """Without a stale copy the request renders after waiting."""
+        url = reverse('posts:index')
+        with mock.patch('core.caching.cache.add', return_value=False):
+            response = self.guest_client.get(url)
+        self.assertContains(response, 'Текст')
@@ -0,0 +1,127 @@
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Relevance order comes from the full-text ranking, it cannot be indexed.
+SORTED_VIEWS = ('posts:search_results',)
+
+
+def plan_problems(sql, allow_sort=False):
+    """Return the steps of the query plan that read or sort too much."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        details = [row[-1] for row in cursor.fetchall()]
+    problems = []
+    for detail in details:
+        full_scan = detail.startswith('SCAN ') and not any(
+            marker in detail for marker in (
+                'USING INDEX', 'USING COVERING INDEX', 'VIRTUAL TABLE',
+                'CONSTANT ROW'
+            )
+        )
+        sort = 'TEMP B-TREE' in detail and not allow_sort
+        if full_scan or sort:
+            problems.append(detail)
+    return problems
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Query plans of SQLite.')
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.user = User.objects.create(username='reader')
+        cls.other = User.objects.create(username='other')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Кошки {number}'
+            ) for number in range(15)
+        ]
+        cls.post = cls.posts[-1]
+        cls.comment = Comment.objects.create(
+            post=cls.post, author=cls.user, text='Коммент'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def requests(self):
+        post_id = self.post.pk
+        return [
+            ('posts:index', self.client, 'get', {}, {}),
+            ('posts:index', Client(), 'get', {}, {'page': 2}),
+            ('posts:group_list', Client(), 'get', {'slug': 'group'}, {}),
+            ('posts:profile', self.client, 'get', {'username': 'author'}, {}),
+            ('posts:post_detail', self.client, 'get', {'post_id': post_id},
+             {}),
+            ('posts:comment_list', Client(), 'get', {'post_id': post_id},
+             {}),
+            ('posts:follow_index', self.client, 'get', {}, {}),
+            ('posts:search_results', Client(), 'get', {}, {'q': 'кошки'}),
+            ('posts:post_create', self.client, 'post', {},
+             {'text': 'Новый пост', 'group': self.group.pk}),
+            ('posts:edit', self.author_client, 'post', {'post_id': post_id},
+             {'text': 'Правка'}),
+            ('posts:add_comment', self.client, 'post', {'post_id': post_id},
+             {'text': 'Ещё коммент'}),
+            ('posts:profile_follow', self.client, 'get',
+             {'username': 'other'}, {}),
+            ('posts:profile_unfollow', self.client, 'get',
+             {'username': 'other'}, {}),
+            ('posts:comment_delete', self.client, 'get',
+             {'post_id': post_id, 'comment_id': self.comment.pk}, {}),
+            ('posts:post_delete', self.author_client, 'get',
+             {'post_id': self.posts[0].pk}, {}),
+        ]
+
+    def check_plans(self, requests):
+        for name, client, method, kwargs, data in requests:
+            with self.subTest(view=name, data=data):
+                with CaptureQueriesContext(connection) as queries:
+                    response = getattr(client, method)(
+                        reverse(name, kwargs=kwargs), data
+                    )
+                self.assertLess(response.status_code, 400)
+                for query in queries.captured_queries:
+                    sql = query['sql']
+                    if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                        continue
+                    problems = plan_problems(sql, name in SORTED_VIEWS)
+                    self.assertEqual(problems, [], sql)
+
+    def test_views_use_indexes(self):
+        """Queries of the views neither scan tables nor sort rows."""
+        self.check_plans(self.requests())
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_cursor_pages_use_indexes(self):
+        """Keyset pages are read in the order of the indexes."""
+        cursor = self.client.get(reverse('posts:index')).context[
+            'page_obj'
+        ].next_cursor
+        self.check_plans([
+            ('posts:index', self.client, 'get', {}, {'after': cursor}),
+            ('posts:index', self.client, 'get', {}, {'before': cursor}),
+            ('posts:group_list', self.client, 'get', {'slug': 'group'},
+             {'after': cursor}),
+            ('posts:profile', self.client, 'get', {'username': 'author'},
+             {'after': cursor}),
+        ])
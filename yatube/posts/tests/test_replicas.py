@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections, router
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from core import replicas
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+REPLICA = 'replica'
+
+
+@skipUnless(connection.vendor == 'sqlite', 'File copies of SQLite.')
+@override_settings(
+    DATABASE_REPLICAS=[REPLICA],
+    REPLICA_LAG_CHECK_INTERVAL=0,
+    PAGE_CACHE_TIMEOUT=0,
+)
+class ReplicaTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        connections.databases[REPLICA] = dict(
+            connections.databases['default'],
+            NAME=os.path.join(self.directory, 'replica.sqlite3'),
+        )
+        self.author = User.objects.create(username='author')
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.post = Post.objects.create(
+            author=self.author, group=self.group, text='Старый пост'
+        )
+        call_command('copy_replica', once=True, stdout=StringIO())
+        self.new_post = Post.objects.create(
+            author=self.author, group=self.group, text='Новый пост'
+        )
+        self.client = Client()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def tearDown(self):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.databases[REPLICA]
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def pages(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:search_results') + '?q=пост',
+        ]
+
+    def test_read_only_views_read_from_the_replica(self):
+        for url in self.pages():
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertContains(response, 'Старый')
+                self.assertNotContains(response, 'Новый')
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.new_post.pk})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_other_views_read_from_the_primary(self):
+        response = self.author_client.get(
+            reverse('posts:edit', kwargs={'post_id': self.new_post.pk})
+        )
+        self.assertContains(response, 'Новый пост')
+
+    def test_writers_read_their_writes(self):
+        response = self.author_client.post(
+            reverse('posts:post_create'), {'text': 'Свежий пост'}
+        )
+        self.assertIn(settings.REPLICA_PIN_COOKIE, response.cookies)
+        for url in self.pages():
+            with self.subTest(url=url):
+                self.assertContains(self.author_client.get(url), 'Новый')
+        self.assertContains(
+            self.author_client.get(reverse('posts:index')), 'Свежий пост'
+        )
+
+    def test_lagging_replicas_are_skipped(self):
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        with override_settings(REPLICA_MAX_LAG=60):
+            call_command('copy_replica', once=True, stdout=StringIO())
+            Post.objects.create(author=self.author, text='Ещё пост')
+            self.assertNotContains(self.client.get(url), 'Ещё пост')
+        with override_settings(REPLICA_MAX_LAG=-1):
+            self.assertContains(self.client.get(url), 'Ещё пост')
+
+    def test_missing_replicas_are_skipped(self):
+        connections[REPLICA].close()
+        os.remove(connections.databases[REPLICA]['NAME'])
+        with override_settings(REPLICA_MAX_LAG=3600):
+            response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, 'Новый пост')
+
+    def test_replicas_are_read_only(self):
+        with self.assertRaises(OperationalError):
+            Post.objects.using(REPLICA).filter(pk=self.post.pk).update(
+                text='Правка'
+            )
+        self.assertFalse(router.allow_migrate(REPLICA, 'posts'))
+        self.assertLess(replicas.lag(REPLICA), 60)
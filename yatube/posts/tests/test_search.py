@@ -0,0 +1,73 @@
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.writer = User.objects.create(username='writer')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Кошки спят весь день'
+        )
+        cls.other_post = Post.objects.create(
+            author=cls.writer,
+            text='Кошки, кошки и ещё раз кошки'
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def search(self, query):
+        return self.guest_client.get(
+            reverse('posts:search_results'), {'q': query}
+        )
+
+    def test_search_by_text_is_ranked(self):
+        """The most relevant post comes first."""
+        response = self.search('кошк')
+        self.assertTrue(response.context['results'])
+        self.assertEqual(
+            list(response.context['page_obj']),
+            [self.other_post, self.post]
+        )
+
+    def test_search_by_author(self):
+        """Posts are found by the author's username."""
+        response = self.search('writ')
+        self.assertEqual(list(response.context['page_obj']), [self.other_post])
+
+    def test_snippet_is_highlighted_and_escaped(self):
+        """Matches are marked, the post text is escaped."""
+        Post.objects.create(author=self.author, text='<b>собаки</b>')
+        response = self.search('собаки')
+        self.assertContains(response, '<mark>собаки</mark>')
+        self.assertNotContains(response, '<b>')
+
+    def test_index_follows_edits_and_deletes(self):
+        """Index is kept in sync with the posts table."""
+        Post.objects.filter(pk=self.post.pk).update(text='Попугаи')
+        self.assertEqual(
+            list(self.search('попугаи').context['page_obj']), [self.post]
+        )
+        Post.objects.filter(pk=self.post.pk).delete()
+        self.assertFalse(self.search('попугаи').context['results'])
+
+    def test_empty_query(self):
+        """Empty query finds nothing."""
+        response = self.search('')
+        self.assertFalse(response.context['results'])
+
+    def test_rebuild_command(self):
+        """Rebuilt index still finds the posts."""
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        response = self.search('кошки')
+        self.assertEqual(len(response.context['page_obj']), 2)
@@ -0,0 +1,243 @@
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import Client, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import counters, shards
+from ..models import Comment, Follow, Group, Post, UserStats
+
+User = get_user_model()
+
+SHARDS = ['shard0', 'shard1']
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Shards in SQLite files.')
+@override_settings(
+    POST_SHARDS=SHARDS,
+    POSTS_NUM=3,
+    PAGE_CACHE_TIMEOUT=0,
+    QUERY_BUDGET_STRICT=True,
+)
+class ShardTests(TransactionTestCase):
+    databases = {'default', *SHARDS}
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        for alias in SHARDS:
+            connections.databases[alias] = dict(
+                connections.databases['default'],
+                NAME=os.path.join(cls.directory, f'{alias}.sqlite3'),
+            )
+            call_command('migrate', database=alias, verbosity=0)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        for alias in SHARDS:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+        shutil.rmtree(cls.directory, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        self.authors = {}
+        number = 0
+        while len(self.authors) < len(SHARDS):
+            user = User.objects.create(username=f'author{number}')
+            self.authors.setdefault(shards.database_for_author(user.pk), user)
+            number += 1
+        self.first, self.second = self.authors.values()
+        self.reader = User.objects.create(username='reader')
+        self.client = Client()
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def create_posts(self, total):
+        """Create posts of both authors, one minute apart, oldest first."""
+        start = timezone.now() - timedelta(days=1)
+        posts = []
+        for number in range(total):
+            post = Post.objects.create(
+                author=self.first if number % 2 else self.second,
+                group=self.group,
+                text=f'Пост {number}',
+            )
+            post.created = start + timedelta(minutes=number)
+            post.save()
+            posts.append(post)
+        return posts
+
+    def texts(self, response):
+        return [post.text for post in response.context['page_obj']]
+
+    def test_posts_are_stored_on_the_shard_of_the_author(self):
+        for alias, author in self.authors.items():
+            post = Post.objects.create(author=author, text='Пост')
+            with self.subTest(alias=alias):
+                self.assertEqual(post._state.db, alias)
+                self.assertEqual(shards.database_for_post(post.pk), alias)
+                self.assertTrue(
+                    Post.objects.using(alias).filter(pk=post.pk).exists()
+                )
+                self.assertFalse(
+                    Post.objects.using('default').filter(pk=post.pk).exists()
+                )
+        self.assertEqual(UserStats.objects.get(user=self.first).posts_count, 1)
+
+    def test_post_pages_merge_the_shards_in_order(self):
+        self.create_posts(7)
+        expected = [f'Пост {number}' for number in range(6, -1, -1)]
+        urls = (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+        )
+        for url in urls:
+            with self.subTest(url=url):
+                texts = []
+                for page in (1, 2, 3):
+                    response = self.client.get(url, {'page': page})
+                    paginator = response.context['page_obj'].paginator
+                    self.assertEqual(paginator.count, 7)
+                    texts += self.texts(response)
+                self.assertEqual(texts, expected)
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_cursor_pages_merge_the_shards_in_order(self):
+        self.create_posts(7)
+        texts, params = [], {}
+        while True:
+            response = self.client.get(reverse('posts:index'), params)
+            page = response.context['page_obj']
+            texts += self.texts(response)
+            if not page.has_next():
+                break
+            params = {'after': page.next_cursor}
+        self.assertEqual(
+            texts, [f'Пост {number}' for number in range(6, -1, -1)]
+        )
+
+    def test_search_merges_the_shards(self):
+        self.create_posts(2)
+        response = self.client.get(
+            reverse('posts:search_results'), {'q': 'Пост'}
+        )
+        self.assertEqual(len(response.context['page_obj']), 2)
+
+    def test_profile_reads_one_shard(self):
+        self.create_posts(4)
+        alias = shards.database_for_author(self.first.pk)
+        other = next(shard for shard in SHARDS if shard != alias)
+        with CaptureQueriesContext(connections[other]) as queries:
+            response = self.client.get(reverse(
+                'posts:profile', kwargs={'username': self.first.username}
+            ))
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(self.texts(response), ['Пост 3', 'Пост 1'])
+        self.assertEqual(response.context['stats'].posts_count, 2)
+
+    def test_feed_merges_the_followed_authors(self):
+        self.create_posts(4)
+        Follow.objects.create(user=self.reader, author=self.first)
+        Follow.objects.create(user=self.reader, author=self.second)
+        response = self.reader_client.get(reverse('posts:follow_index'))
+        self.assertEqual(self.texts(response), ['Пост 3', 'Пост 2', 'Пост 1'])
+
+    def test_post_and_comments_are_read_from_one_shard(self):
+        post = Post.objects.create(author=self.first, text='Мой пост')
+        alias = post._state.db
+        self.reader_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': post.pk}),
+            {'text': 'Коммент'}
+        )
+        comment = Comment.objects.using(alias).get(post_id=post.pk)
+        self.assertEqual(comment.author_id, self.reader.pk)
+        post.refresh_from_db()
+        self.assertEqual(post.comments_count, 1)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post.pk})
+        )
+        self.assertContains(response, 'Мой пост')
+        self.assertContains(response, 'Коммент')
+        self.assertEqual(response.context['author_stats'].posts_count, 1)
+        self.reader_client.post(reverse(
+            'posts:comment_delete',
+            kwargs={'post_id': post.pk, 'comment_id': comment.pk}
+        ))
+        self.assertFalse(Comment.objects.using(alias).exists())
+
+    def test_posts_are_edited_and_deleted_on_their_shard(self):
+        post = Post.objects.create(author=self.first, text='Старый текст')
+        author_client = Client()
+        author_client.force_login(self.first)
+        author_client.post(
+            reverse('posts:edit', kwargs={'post_id': post.pk}),
+            {'text': 'Новый текст', 'group': self.group.pk}
+        )
+        post.refresh_from_db()
+        self.assertEqual(post.text, 'Новый текст')
+        self.assertEqual(post.group_id, self.group.pk)
+        author_client.post(
+            reverse('posts:post_delete', kwargs={'post_id': post.pk})
+        )
+        self.assertFalse(Post.objects.using(post._state.db).exists())
+
+    def test_posts_of_unknown_shards_are_not_found(self):
+        post_id = settings.POST_SHARD_SLOTS + len(SHARDS)
+        response = self.client.get(
+            reverse('posts:post_detail', kwargs={'post_id': post_id})
+        )
+        self.assertEqual(response.status_code, 404)
+
+    def test_counters_are_reconciled_over_the_shards(self):
+        self.create_posts(3)
+        UserStats.objects.update(posts_count=0)
+        Post.objects.using(
+            shards.database_for_author(self.second.pk)
+        ).update(comments_count=5)
+        self.assertEqual(counters.reconcile(), 4)
+        self.assertEqual(
+            UserStats.objects.get(user=self.second).posts_count, 2
+        )
+        self.assertEqual(
+            UserStats.objects.get(user=self.first).posts_count, 1
+        )
+
+    def test_users_and_groups_are_copied_to_the_shards(self):
+        self.first.first_name = 'Лев'
+        self.first.save()
+        for alias in SHARDS:
+            with self.subTest(alias=alias):
+                copy = User.objects.using(alias).get(pk=self.first.pk)
+                self.assertEqual(copy.first_name, 'Лев')
+                self.assertFalse(copy.has_usable_password())
+        Post.objects.create(author=self.first, group=self.group, text='Пост')
+        self.group.delete()
+        for alias in SHARDS:
+            self.assertFalse(Group.objects.using(alias).exists())
+        self.assertIsNone(
+            Post.objects.using(shards.database_for_author(self.first.pk))
+            .get().group_id
+        )
+        User.objects.using(SHARDS[0]).all().delete()
+        call_command('sync_shards', stdout=StringIO())
+        self.assertEqual(
+            User.objects.using(SHARDS[0]).count(), User.objects.count()
+        )
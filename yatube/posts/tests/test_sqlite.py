@@ -0,0 +1,150 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core import sqlite
+
+from ..models import Post
+
+User = get_user_model()
+
+
+def locked_until(calls, failures, error='database is locked'):
+    """Return a function failing the first failures calls."""
+    def func():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise OperationalError(error)
+        return 'saved'
+    return sqlite.retry_locked(func)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite settings.')
+class PragmaTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_new_connections_get_the_pragmas(self):
+        wrapper = connections['default'].__class__(
+            dict(
+                connection.settings_dict,
+                NAME=os.path.join(self.directory, 'db.sqlite3')
+            ),
+            alias='pragmas'
+        )
+        try:
+            self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'wal')
+            self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)
+            self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+            self.assertEqual(self.pragma(wrapper, 'cache_size'), -64000)
+            self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)
+        finally:
+            wrapper.close()
+
+
+@override_settings(SQLITE_RETRY_DELAY=0, SQLITE_WRITE_RETRIES=2)
+class RetryLockedTests(TransactionTestCase):
+    def test_locked_writes_are_retried(self):
+        calls = []
+        self.assertEqual(locked_until(calls, 2)(), 'saved')
+        self.assertEqual(len(calls), 3)
+
+    def test_retries_are_limited(self):
+        calls = []
+        with self.assertRaises(OperationalError):
+            locked_until(calls, 3)()
+        self.assertEqual(len(calls), 3)
+
+    def test_other_errors_are_not_retried(self):
+        calls = []
+        with self.assertRaises(OperationalError):
+            locked_until(calls, 1, 'no such table: posts_post')()
+        self.assertEqual(len(calls), 1)
+
+    def test_writes_of_a_retry_are_rolled_back(self):
+        author = User.objects.create(username='author')
+        calls = []
+
+        @sqlite.retry_locked
+        def create():
+            calls.append(1)
+            Post.objects.create(author=author, text='Пост')
+            if len(calls) == 1:
+                raise OperationalError('database is locked')
+
+        create()
+        self.assertEqual(Post.objects.count(), 1)
+
+
+class NestedRetryLockedTests(TestCase):
+    def test_nested_transactions_are_not_retried(self):
+        calls = []
+        with self.assertRaises(OperationalError):
+            locked_until(calls, 1)()
+        self.assertEqual(len(calls), 1)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'SQLite maintenance.')
+class MaintenanceTests(TransactionTestCase):
+    def setUp(self):
+        author = User.objects.create(username='author')
+        Post.objects.bulk_create(
+            Post(author=author, text=f'Пост {number}') for number in range(5)
+        )
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def backup(self, **options):
+        call_command(
+            'backup_database', directory=self.directory, stdout=StringIO(),
+            **options
+        )
+        return sorted(os.listdir(self.directory))
+
+    def test_backup_copies_the_database(self):
+        for pages in (None, 1):
+            with self.subTest(pages=pages):
+                name = self.backup(pages=pages)[-1]
+                copy = sqlite3.connect(os.path.join(self.directory, name))
+                try:
+                    count = copy.execute(
+                        'SELECT COUNT(*) FROM posts_post'
+                    ).fetchone()[0]
+                finally:
+                    copy.close()
+                self.assertEqual(count, 5)
+
+    def test_old_backups_are_deleted(self):
+        for _ in range(3):
+            names = self.backup(keep=2)
+        self.assertEqual(len(names), 2)
+        self.assertFalse(any(name.endswith('.part') for name in names))
+
+    def test_optimize_runs_analyze(self):
+        call_command(
+            'optimize_database', once=True, analyze=True, stdout=StringIO()
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            )
+            self.assertIsNotNone(cursor.fetchone())
@@ -0,0 +1,138 @@
+import gzip
+import os
+import shutil
+import tempfile
+from unittest import skipUnless
+from wsgiref.util import setup_testing_defaults
+
+from django.conf import settings
+from django.core.management import call_command
+from django.templatetags.static import static
+from django.test import SimpleTestCase, override_settings
+
+from core import storage
+from core.static import StaticFilesApplication, accepted_encodings
+
+CSS = b'body { color: red; }\n' * 200
+
+
+def not_found(environ, start_response):
+    start_response('404 Not Found', [])
+    return [b'site']
+
+
+class StaticFilesTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, directory)
+        source = os.path.join(directory, 'source')
+        self.root = os.path.join(directory, 'root')
+        os.makedirs(os.path.join(source, 'css'))
+        with open(os.path.join(source, 'css', 'site.css'), 'wb') as file:
+            file.write(CSS)
+        with open(os.path.join(source, 'logo.png'), 'wb') as file:
+            file.write(os.urandom(512))
+        settings_override = override_settings(
+            STATICFILES_DIRS=[source],
+            STATIC_ROOT=self.root,
+            DEBUG=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        call_command(
+            'collectstatic',
+            interactive=False,
+            verbosity=0,
+            ignore_patterns=['admin', 'debug_toolbar'],
+        )
+        self.css = static('css/site.css')[len(settings.STATIC_URL):]
+
+    def request(self, path, **headers):
+        environ = {'PATH_INFO': path, **headers}
+        setup_testing_defaults(environ)
+        response = {}
+
+        def start_response(status, headers):
+            response['status'] = status
+            response['headers'] = dict(headers)
+
+        application = StaticFilesApplication(not_found)
+        body = b''.join(application(environ, start_response))
+        return response['status'], response['headers'], body
+
+    def test_hashed_urls(self):
+        """Templates link to the file names with the content hash."""
+        self.assertRegex(self.css, r'^css/site\.[0-9a-f]{12}\.css$')
+        self.assertTrue(os.path.isfile(os.path.join(self.root, self.css)))
+
+    def test_compressed_copies(self):
+        """Text assets get compressed copies, images do not."""
+        with open(os.path.join(self.root, self.css + '.gz'), 'rb') as file:
+            self.assertEqual(gzip.decompress(file.read()), CSS)
+        self.assertFalse(any(
+            name.startswith('logo.') and name.endswith('.gz')
+            for name in os.listdir(self.root)
+        ))
+
+    @skipUnless(storage.brotli, 'The brotli package is missing.')
+    def test_brotli_copies(self):
+        path = os.path.join(self.root, self.css + '.br')
+        with open(path, 'rb') as file:
+            self.assertEqual(storage.brotli.decompress(file.read()), CSS)
+
+    def test_accepted_encodings(self):
+        self.assertEqual(
+            accepted_encodings('gzip;q=0.8, br;q=0, deflate'),
+            {'gzip', 'deflate'}
+        )
+        self.assertEqual(accepted_encodings('*'), {'*', 'br', 'gzip'})
+
+    def test_server_picks_encoding(self):
+        """The best encoding the client accepts is sent."""
+        path = settings.STATIC_URL + self.css
+        cases = [
+            ('gzip, deflate', 'gzip'),
+            ('identity', None),
+        ]
+        if storage.brotli:
+            cases.append(('gzip, br', 'br'))
+        for accept, coding in cases:
+            with self.subTest(accept=accept):
+                status, headers, body = self.request(
+                    path, HTTP_ACCEPT_ENCODING=accept
+                )
+                self.assertEqual(status, '200 OK')
+                self.assertEqual(headers.get('Content-Encoding'), coding)
+                self.assertEqual(headers['Vary'], 'Accept-Encoding')
+                self.assertTrue(headers['Content-Type'].startswith('text/css'))
+                self.assertEqual(int(headers['Content-Length']), len(body))
+                if coding is None:
+                    self.assertEqual(body, CSS)
+
+    def test_hashed_files_are_cached_for_a_year(self):
+        _, headers, _ = self.request(settings.STATIC_URL + self.css)
+        self.assertIn('max-age=31536000', headers['Cache-Control'])
+        self.assertIn('immutable', headers['Cache-Control'])
+        _, headers, _ = self.request(settings.STATIC_URL + 'css/site.css')
+        self.assertEqual(headers['Cache-Control'], 'no-cache')
+
+    def test_not_modified(self):
+        path = settings.STATIC_URL + self.css
+        _, headers, _ = self.request(path)
+        status, _, body = self.request(
+            path, HTTP_IF_NONE_MATCH=headers['ETag']
+        )
+        self.assertEqual(status, '304 Not Modified')
+        self.assertEqual(body, b'')
+
+    def test_other_paths_reach_the_site(self):
+        """Missing files and paths outside the root go to the site."""
+        for path in (
+            '/about/',
+            settings.STATIC_URL + 'missing.css',
+            settings.STATIC_URL + self.css + '.gz',
+            settings.STATIC_URL + '../manage.py',
+        ):
+            with self.subTest(path=path):
+                status, _, body = self.request(path)
+                self.assertEqual(body, b'site')
@@ -0,0 +1,159 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.template import engines
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+STREAMED = {
+    'posts:index', 'posts:follow_index', 'posts:group_list',
+    'posts:profile', 'posts:post_detail', 'posts:search_results',
+}
+CSRF_TOKEN = re.compile(r'name="csrfmiddlewaretoken" value="[^"]*"')
+
+
+def body(response):
+    return b''.join(response.streaming_content).decode()
+
+
+@override_settings(STREAMING_VIEWS=STREAMED, STREAM_CHUNK_SIZE=512)
+class StreamingTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        cls.user = User.objects.create(username='reader')
+        cls.group = Group.objects.create(
+            title='Группа', slug='group', description='Описание'
+        )
+        Follow.objects.create(user=cls.user, author=cls.author)
+        for number in range(12):
+            Post.objects.create(
+                author=cls.author, group=cls.group, text=f'Кошки {number}'
+            )
+        cls.post = Post.objects.last()
+        for number in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.user, text=f'Коммент {number}'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def pages(self):
+        return [
+            reverse('posts:index'),
+            reverse('posts:follow_index'),
+            reverse('posts:group_list', kwargs={'slug': 'group'}),
+            reverse('posts:profile', kwargs={'username': 'author'}),
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk}),
+            reverse('posts:search_results') + '?q=кошки',
+        ]
+
+    def test_streamed_pages_match_rendered_ones(self):
+        """Streamed pages are the pages rendered whole."""
+        for url in self.pages():
+            with self.subTest(url=url):
+                streamed = self.client.get(url)
+                self.assertTrue(streamed.streaming)
+                with override_settings(STREAMING_VIEWS=set()):
+                    rendered = self.client.get(url)
+                self.assertFalse(rendered.streaming)
+                self.assertEqual(
+                    CSRF_TOKEN.sub('', body(streamed)),
+                    CSRF_TOKEN.sub('', rendered.content.decode())
+                )
+
+    def test_header_is_sent_before_posts(self):
+        """The first chunk has the header but none of the posts."""
+        for url in self.pages():
+            with self.subTest(url=url):
+                chunks = self.client.get(url).streaming_content
+                first = next(chunks).decode()
+                self.assertIn('</header>', first)
+                self.assertNotIn('Кошки 11', first)
+                self.assertNotIn('Коммент 0', first)
+                self.assertGreater(len(list(chunks)), 1)
+
+    def test_posts_are_read_while_streaming(self):
+        """The feed page is read after the view returns."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('posts:follow_index'))
+        self.assertFalse(any(
+            'LIMIT' in query['sql'] and 'posts_post' in query['sql']
+            for query in queries.captured_queries
+        ))
+        self.assertIn('Кошки 11', body(response))
+
+    def test_csrf_token_works(self):
+        """The comment form of a streamed page can be sent."""
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertIn('csrftoken', response.cookies)
+        self.assertIn('Cookie', response['Vary'])
+        token = re.search(
+            r'name="csrfmiddlewaretoken" value="([^"]*)"', body(response)
+        ).group(1)
+        response = client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Новый коммент', 'csrfmiddlewaretoken': token}
+        )
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(
+            Comment.objects.filter(text='Новый коммент').exists()
+        )
+
+    @override_settings(PAGE_CACHE_TIMEOUT=60)
+    def test_cached_pages_are_not_streamed(self):
+        """Pages kept by the page cache are rendered whole."""
+        response = Client().get(reverse('posts:index'))
+        self.assertFalse(response.streaming)
+        self.assertContains(response, 'Кошки 11')
+
+    def test_views_not_listed_are_not_streamed(self):
+        with override_settings(STREAMING_VIEWS={'posts:index'}):
+            response = self.client.get(
+                reverse('posts:group_list', kwargs={'slug': 'group'})
+            )
+        self.assertFalse(response.streaming)
+
+    @override_settings(QUERY_BUDGET_STRICT=True)
+    def test_query_budgets_count_streamed_queries(self):
+        """Queries run while the page is sent count against its budget."""
+        url = reverse('posts:follow_index')
+        with override_settings(STREAMING_VIEWS=set()):
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get(url)
+        view = self.client.get(url).resolver_match.func
+        budget = view.query_budget
+        try:
+            view.query_budget = type(budget)(len(queries) - 1)
+            cache.clear()
+            response = self.client.get(url)
+            with self.assertRaises(AssertionError):
+                body(response)
+        finally:
+            view.query_budget = budget
+
+    @override_settings(TEMPLATE_ENGINES={'posts:index': 'jinja2'})
+    def test_jinja2_pages_are_streamed(self):
+        if 'jinja2' not in engines.templates:
+            self.skipTest('The jinja2 package is missing.')
+        response = self.client.get(reverse('posts:index'))
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 1)
+        self.assertIn(b'<head>', chunks[0])
+        self.assertNotIn('Кошки 11'.encode(), chunks[0])
+        self.assertIn('Кошки 11'.encode(), b''.join(chunks))
@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+
+from django.conf import settings
+from django.template import Context, Engine
+from django.test import SimpleTestCase
+
+from core.template_loaders import precompile
+
+LOADERS = ['django.template.loaders.filesystem.Loader']
+
+
+class TemplateLoaderTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(dir=settings.BASE_DIR)
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.write('page.html', 'Старая версия')
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def engine(self, reload):
+        return Engine(
+            dirs=[self.directory],
+            loaders=[('core.template_loaders.Loader', LOADERS, reload)]
+        )
+
+    def render(self, engine):
+        return engine.get_template('page.html').render(Context())
+
+    def test_templates_are_compiled_once(self):
+        """The compiled template is reused until the process restarts."""
+        engine = self.engine(reload=False)
+        template = engine.get_template('page.html')
+        path = self.write('page.html', 'Новая версия')
+        os.utime(path, ns=(1, 1))
+        self.assertIs(engine.get_template('page.html'), template)
+
+    def test_reload_picks_up_changes(self):
+        """With reload a changed file is compiled again."""
+        engine = self.engine(reload=True)
+        self.assertEqual(self.render(engine), 'Старая версия')
+        path = self.write('page.html', 'Новая версия')
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(self.render(engine), 'Новая версия')
+
+    def test_precompile_project_templates(self):
+        """Every project template compiles and lands in the cache."""
+        count, elapsed = precompile()
+        self.assertGreater(count, 20)
+        self.assertGreater(elapsed, 0)
@@ -0,0 +1,102 @@
+import io
+import shutil
+import tempfile
+from concurrent.futures import Executor, Future
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import override_settings, TestCase
+from PIL import Image
+from sorl.thumbnail import default
+from sorl.thumbnail.images import ImageFile
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+class InlineExecutor(Executor):
+    """Executor running the submitted work at once, counting the calls."""
+
+    def __init__(self):
+        self.submitted = []
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(args)
+        future = Future()
+        future.set_result(fn(*args, **kwargs))
+        return future
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='author')
+        buffer = io.BytesIO()
+        Image.new('RGB', (64, 32), 'red').save(buffer, 'JPEG')
+        cls.post = Post.objects.create(
+            author=cls.author,
+            text='Текст',
+            image=SimpleUploadedFile('red.jpg', buffer.getvalue())
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def test_schedule_renders_every_geometry(self):
+        """All template geometries are stored after scheduling."""
+        thumbnails.schedule(self.post.image.name)
+        source = ImageFile(self.post.image.name)
+        for geometry, options in thumbnails.GEOMETRIES:
+            with self.subTest(geometry=geometry):
+                name = default.backend._get_thumbnail_filename(
+                    source, geometry, {**default.backend.default_options,
+                                       **options}
+                )
+                self.assertIsNotNone(default.kvstore.get(ImageFile(name)))
+
+    def test_missing_image_is_skipped(self):
+        """Nothing is rendered for a file that is not in the storage."""
+        with mock.patch.object(thumbnails, 'generate') as generate:
+            thumbnails.schedule('posts/missing.jpg')
+        generate.assert_not_called()
+
+    @override_settings(THUMBNAIL_WORKERS=2)
+    def test_schedule_uses_process_pool(self):
+        """With workers the image is sent to the process pool."""
+        with mock.patch.object(thumbnails, 'get_executor') as get_executor:
+            thumbnails.schedule(self.post.image.name)
+        get_executor.return_value.submit.assert_called_once_with(
+            thumbnails.generate, self.post.image.name
+        )
+
+    def test_command_renders_images_in_chunks(self):
+        """The command sends chunks of names and counts the failures."""
+        Post.objects.create(
+            author=self.author, text='Текст', image='posts/missing.jpg'
+        )
+        executor = InlineExecutor()
+        output = io.StringIO()
+
+        def generate(name):
+            if name == 'posts/missing.jpg':
+                raise OSError(name)
+
+        with mock.patch.object(
+            thumbnails, 'get_executor', return_value=executor
+        ), mock.patch.object(thumbnails, 'generate', generate):
+            call_command(
+                'generate_thumbnails', workers=1, chunk_size=1, stdout=output
+            )
+        self.assertEqual(len(executor.submitted), 2)
+        self.assertIn('rendered for 1 images, failed: 1', output.getvalue())
@@ -0,0 +1,128 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, override_settings, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from .. import follows
+from ..models import Follow, Post, Timeline, UserStats
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create(username='NoName')
+        cls.author = User.objects.create(username='author')
+        cls.post = Post.objects.create(author=cls.author, text='Текст')
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def follow_page_posts(self):
+        response = self.authorized_client.get(reverse('posts:follow_index'))
+        return list(response.context['page_obj'])
+
+    def test_follow_backfills_timeline(self):
+        """Following copies the author's posts into the feed."""
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertTrue(
+            Timeline.objects.filter(user=self.user, post=self.post).exists()
+        )
+        self.assertEqual(self.follow_page_posts(), [self.post])
+
+    def test_new_post_is_fanned_out(self):
+        """A new post is written to the followers' feeds."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertEqual(self.follow_page_posts(), [new_post, self.post])
+
+    def test_unfollow_and_delete_clean_timeline(self):
+        """Unfollowing and deleting posts remove the feed entries."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        new_post.delete()
+        self.assertEqual(self.follow_page_posts(), [self.post])
+        Follow.objects.get(user=self.user, author=self.author).delete()
+        self.assertFalse(Timeline.objects.filter(user=self.user).exists())
+        self.assertEqual(self.follow_page_posts(), [])
+
+    @override_settings(TIMELINE_LENGTH=1)
+    def test_timeline_is_trimmed(self):
+        """The feed keeps only the configured number of entries."""
+        Post.objects.create(author=self.author, text='Новый')
+        Follow.objects.create(user=self.user, author=self.author)
+        self.assertEqual(Timeline.objects.filter(user=self.user).count(), 1)
+
+    @override_settings(TIMELINE_LENGTH=2)
+    def test_fan_out_trims_timelines(self):
+        """New posts push the oldest entries out of the followers' feeds."""
+        other = User.objects.create(username='other')
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(user=other, author=self.author)
+        posts = [
+            Post.objects.create(author=self.author, text=f'Новый {number}')
+            for number in range(3)
+        ]
+        for user in (self.user, other):
+            with self.subTest(user=user.username):
+                self.assertEqual(
+                    [entry.post for entry in Timeline.objects.filter(
+                        user=user
+                    )],
+                    [posts[2], posts[1]]
+                )
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=1)
+    def test_popular_author_is_merged_on_read(self):
+        """Posts of popular authors are not written to the feeds."""
+        Follow.objects.create(user=self.user, author=self.author)
+        new_post = Post.objects.create(author=self.author, text='Новый')
+        self.assertFalse(Timeline.objects.filter(user=self.user).exists())
+        self.assertEqual(self.follow_page_posts(), [new_post, self.post])
+
+    @override_settings(TIMELINE_FANOUT_LIMIT=2)
+    def test_post_reaches_feed_when_counters_drift(self):
+        """Fan-out and the feed agree on who is popular."""
+        Follow.objects.create(user=self.user, author=self.author)
+        Follow.objects.create(
+            user=User.objects.create(username='other'), author=self.author
+        )
+        for followers in (2, 0):
+            UserStats.objects.filter(user=self.author).update(
+                followers_count=followers
+            )
+            follows.forget_popular()
+            new_post = Post.objects.create(
+                author=self.author, text=f'Подписчиков {followers}'
+            )
+            with self.subTest(followers=followers):
+                self.assertIn(new_post, self.follow_page_posts())
+
+    def unfollow_below_limit(self, limit):
+        """Drop the author below the fan-out limit, return the queries."""
+        followers = [
+            User.objects.create(username=f'{limit}follower{number}')
+            for number in range(limit)
+        ]
+        with override_settings(TIMELINE_FANOUT_LIMIT=limit):
+            for follower in followers:
+                Follow.objects.create(user=follower, author=self.author)
+            follow = Follow.objects.get(user=followers[0], author=self.author)
+            with CaptureQueriesContext(connection) as queries:
+                follow.delete()
+        for follower in followers[1:]:
+            self.assertTrue(Timeline.objects.filter(
+                user=follower, post=self.post
+            ).exists())
+        Follow.objects.filter(author=self.author).delete()
+        return len(queries)
+
+    def test_author_below_limit_is_backfilled_at_once(self):
+        """Feeds of all followers are filled without a query per follower."""
+        self.assertEqual(
+            self.unfollow_below_limit(3), self.unfollow_below_limit(6)
+        )
@@ -10,6 +10,7 @@ from django.test import Client, override_settings, TestCase
 from django.urls import reverse
 
 from ..models import Comment, Follow, Group, Post
+from ..utils import CachedCountPaginator
 
 User = get_user_model()
 
@@ -160,6 +161,18 @@ class PostViewsTests(TestCase):
         cache.clear()
         self.assertEqual(Post.objects.count(), 0)
 
+    def test_profile_shows_new_comment_count(self):
+        """A cached profile is refreshed when a comment is added."""
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        self.assertContains(self.guest_client.get(url), 'Комментариев: 1')
+        self.authorized_client.post(
+            reverse('posts:add_comment', kwargs={'post_id': self.post.pk}),
+            {'text': 'Ещё коммент'}
+        )
+        response = self.guest_client.get(url)
+        self.assertFalse(response.has_header('X-Page-Cache'))
+        self.assertContains(response, 'Комментариев: 2')
+
     def test_authorized_client_follows(self):
         """Follow func check."""
         self.authorized_client.get(reverse(
@@ -240,6 +253,7 @@ class PaginatorViewsTest(TestCase):
 
     def setUp(self):
         self.guest_client = Client()
+        cache.clear()
 
     def test_pages_contains_count_of_records(self):
         """Paginator works correctly."""
@@ -259,3 +273,46 @@ class PaginatorViewsTest(TestCase):
                     settings.POSTS_NUM
                 )
                 self.assertEqual(len(response_page_2.context['page_obj']), 3)
+
+    @override_settings(POSTS_PAGINATION='cursor')
+    def test_cursor_pages_contain_all_records(self):
+        """Cursor paginator walks through all posts in both directions."""
+        response_page_1 = self.guest_client.get(reverse('posts:index'))
+        page_1 = response_page_1.context['page_obj']
+        self.assertEqual(len(page_1), settings.POSTS_NUM)
+        self.assertFalse(page_1.has_previous())
+        response_page_2 = self.guest_client.get(
+            reverse('posts:index'), {'after': page_1.next_cursor}
+        )
+        page_2 = response_page_2.context['page_obj']
+        self.assertEqual(len(page_2), 3)
+        self.assertFalse(page_2.has_next())
+        self.assertEqual(
+            {post.pk for post in page_1} | {post.pk for post in page_2},
+            set(Post.objects.values_list('pk', flat=True))
+        )
+        response_back = self.guest_client.get(
+            reverse('posts:index'), {'before': page_2.previous_cursor}
+        )
+        self.assertEqual(
+            list(response_back.context['page_obj']), list(page_1)
+        )
+
+    def test_broken_cursor_returns_first_page(self):
+        """Broken cursor is ignored."""
+        with self.settings(POSTS_PAGINATION='cursor'):
+            response = self.guest_client.get(
+                reverse('posts:index'), {'after': 'broken'}
+            )
+        self.assertEqual(
+            len(response.context['page_obj']), settings.POSTS_NUM
+        )
+
+    def test_elided_page_range(self):
+        """Only the pages around the current one are listed."""
+        page_range = CachedCountPaginator(
+            range(100), 1
+        ).get_elided_page_range(50)
+        self.assertEqual(
+            page_range, [1, None, 48, 49, 50, 51, 52, None, 100]
+        )
@@ -0,0 +1,80 @@
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.core.files.storage import default_storage
+from sorl.thumbnail import get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+# Every geometry the templates ask sorl for, keep in sync with
+# posts/includes/article.html and posts/post_detail.html.
+GEOMETRIES = (
+    ('960x339', {'crop': 'center', 'upscale': True}),
+)
+
+_executor = None
+
+
+def _init_worker():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+    import django
+    django.setup()
+
+
+def get_executor(workers=None):
+    """Return the process pool that renders thumbnails."""
+    global _executor
+    if workers is not None:
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker
+        )
+    if _executor is None:
+        _executor = get_executor(settings.THUMBNAIL_WORKERS)
+    return _executor
+
+
+def generate(name):
+    """Render all thumbnails of the image, return the image name."""
+    for geometry, options in GEOMETRIES:
+        get_thumbnail(name, geometry, **options)
+    return name
+
+
+def generate_safely(name):
+    """Render the thumbnails, return whether it succeeded."""
+    try:
+        generate(name)
+    except Exception:
+        logger.exception('Thumbnail generation failed: %s', name)
+        return False
+    return True
+
+
+def generate_chunk(names):
+    """Render the thumbnails of the images, return how many succeeded."""
+    return sum(generate_safely(name) for name in names)
+
+
+def _log_failure(future):
+    error = future.exception()
+    if error is not None:
+        logger.error('Thumbnail generation failed', exc_info=error)
+
+
+def schedule(name):
+    """Render the thumbnails of the image off the request path."""
+    try:
+        if not name or not default_storage.exists(name):
+            return
+    except SuspiciousFileOperation:
+        return
+    if not settings.THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    get_executor().submit(generate, name).add_done_callback(_log_failure)
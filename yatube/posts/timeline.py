@@ -0,0 +1,187 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models import OuterRef, Q, Subquery
+
+from . import follows, shards
+from .models import Follow, Post, Timeline, User, UserStats
+
+# How many feeds one statement trims.
+TRIM_BATCH_SIZE = 100
+
+
+def _follower_ids(author_id):
+    return list(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    )
+
+
+def fan_out(post):
+    """Copy a new post into the feeds of the author's followers."""
+    if shards.enabled() or follows.is_popular(post.author_id):
+        return
+    follower_ids = _follower_ids(post.author_id)
+    if not follower_ids:
+        return
+    Timeline.objects.bulk_create(
+        [
+            Timeline(
+                user_id=user_id,
+                post=post,
+                author_id=post.author_id,
+                created=post.created
+            ) for user_id in follower_ids
+        ],
+        batch_size=500,
+        ignore_conflicts=True
+    )
+    trim(*follower_ids)
+
+
+def backfill(user_id, author_id):
+    """Copy recent posts of the author into the user's feed."""
+    if shards.enabled():
+        return
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        'pk', 'created'
+    )[:settings.TIMELINE_BACKFILL]
+    Timeline.objects.bulk_create(
+        [
+            Timeline(
+                user_id=user_id,
+                post_id=post_id,
+                author_id=author_id,
+                created=created
+            ) for post_id, created in posts
+        ],
+        ignore_conflicts=True
+    )
+    trim(user_id)
+
+
+def trim(*user_ids):
+    """Drop the entries that do not fit into the feeds of the users.
+
+    The first entry beyond the feed length is found for all users in one
+    query, only the feeds that are too long are then cut.
+    """
+    overflow = Timeline.objects.filter(
+        user_id=OuterRef('pk')
+    ).order_by('-created').values('created')[
+        settings.TIMELINE_LENGTH:settings.TIMELINE_LENGTH + 1
+    ]
+    cutoffs = list(
+        User.objects.filter(pk__in=user_ids)
+        .annotate(cutoff=Subquery(overflow))
+        .filter(cutoff__isnull=False)
+        .values_list('pk', 'cutoff')
+    )
+    for start in range(0, len(cutoffs), TRIM_BATCH_SIZE):
+        condition = Q()
+        for user_id, created in cutoffs[start:start + TRIM_BATCH_SIZE]:
+            condition |= Q(user_id=user_id, created__lte=created)
+        Timeline.objects.filter(condition).delete()
+
+
+def copy_recent_posts(using=DEFAULT_DB_ALIAS, author_id=None,
+                      skip_popular=True):
+    """Copy the recent posts of followed authors into the feeds.
+
+    Every follower gets the entries ``backfill`` would write, cut to the
+    feed length, in one statement. Only the followers of the author are
+    filled when author_id is given, and popular authors are skipped
+    unless skip_popular is false. Return the number of new entries.
+    """
+    author_filter = 'WHERE author_id = %s' if author_id is not None else ''
+    conditions, stats_join = [], ''
+    params = [author_id] if author_id is not None else []
+    params.append(settings.TIMELINE_BACKFILL)
+    if skip_popular:
+        stats_join = (
+            f'LEFT JOIN {UserStats._meta.db_table} stats '
+            f'ON stats.user_id = follow.author_id '
+        )
+        conditions.append('COALESCE(stats.followers_count, 0) < %s')
+        params.append(settings.TIMELINE_FANOUT_LIMIT)
+    if author_id is not None:
+        conditions.append('follow.author_id = %s')
+        params.append(author_id)
+    where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+    params.append(settings.TIMELINE_LENGTH)
+    connection = connections[using]
+    insert = connection.ops.insert_statement(ignore_conflicts=True)
+    suffix = connection.ops.ignore_conflicts_suffix_sql(ignore_conflicts=True)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'{insert} {Timeline._meta.db_table} '
+            f'(user_id, post_id, author_id, created) '
+            f'SELECT user_id, post_id, author_id, created FROM ('
+            f'SELECT follow.user_id, recent.id AS post_id, '
+            f'recent.author_id, recent.created, ROW_NUMBER() OVER ('
+            f'PARTITION BY follow.user_id ORDER BY recent.created DESC'
+            f') AS feed_position '
+            f'FROM {Follow._meta.db_table} follow '
+            f'JOIN (SELECT id, author_id, created, ROW_NUMBER() OVER ('
+            f'PARTITION BY author_id ORDER BY created DESC'
+            f') AS author_position FROM {Post._meta.db_table} '
+            f'{author_filter}) recent '
+            f'ON recent.author_id = follow.author_id '
+            f'AND recent.author_position <= %s '
+            f'{stats_join}{where}'
+            f') entries WHERE feed_position <= %s {suffix}',
+            params
+        )
+        return cursor.rowcount
+
+
+def rebuild():
+    """Fill all feeds from the subscriptions in one statement.
+
+    Meant for data loaded without signals: every feed gets the entries
+    ``backfill`` would have written, cut to the feed length.
+    """
+    if shards.enabled():
+        return 0
+    return copy_recent_posts()
+
+
+def follow(user_id, author_id):
+    """Fill the feed after a new subscription."""
+    if not follows.is_popular(author_id):
+        backfill(user_id, author_id)
+
+
+def unfollow(user_id, author_id, followers):
+    """Clean the feed after an unsubscription.
+
+    followers is the number of followers the author has left.
+    """
+    Timeline.objects.filter(user_id=user_id, author_id=author_id).delete()
+    limit = settings.TIMELINE_FANOUT_LIMIT
+    if followers == limit - 1 and not shards.enabled():
+        # The author has just stopped being popular, so the posts that
+        # were merged at read time have to be written to the feeds now.
+        copy_recent_posts(author_id=author_id)
+        trim(*_follower_ids(author_id))
+
+
+def feed(user):
+    """Return the posts of the authors the user follows.
+
+    Without popular authors the feed is read in the order of the
+    timeline index, so the database does not sort the posts. Posts on
+    shards have no timeline, the feed is read from every shard.
+    """
+    if shards.enabled():
+        return shards.scatter(Post.objects.filter(
+            author_id__in=list(follows.following_ids(user.pk))
+        ))
+    author_ids = follows.popular_following_ids(user.pk)
+    if not author_ids:
+        return Post.objects.filter(timeline_entries__user=user).order_by(
+            '-timeline_entries__created'
+        )
+    return Post.objects.filter(
+        Q(pk__in=Timeline.objects.filter(user=user).values('post_id'))
+        | Q(author_id__in=author_ids)
+    )
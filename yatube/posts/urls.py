@@ -19,6 +19,11 @@ urlpatterns = [
         views.add_comment,
         name='add_comment'
     ),
+    path(
+        'posts/<int:post_id>/comments/list/',
+        views.comment_list,
+        name='comment_list'
+    ),
     path(
         'posts/<int:post_id>/comments/<int:comment_id>/',
         views.comment_delete,
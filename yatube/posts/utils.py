@@ -1,9 +1,177 @@
+import base64
+import hashlib
+
 from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
 from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from core.sqlite import estimated_rows
+
+
+class CachedCountPaginator(Paginator):
+    """Paginator that keeps large totals in the cache."""
+
+    @cached_property
+    def count(self):
+        """Exact count for small lists, cached count for large ones."""
+        query = getattr(self.object_list, 'query', None)
+        if query is None:
+            return super().count
+        try:
+            sql = str(query)
+        except EmptyResultSet:
+            return 0
+        key = 'paginator:count:' + hashlib.md5(sql.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            if count >= settings.PAGINATOR_CACHED_COUNT_FROM:
+                cache.set(key, count, settings.PAGINATOR_COUNT_TIMEOUT)
+        return count
+
+    def get_elided_page_range(self, number, on_each_side=2, on_ends=1):
+        """Return page numbers around the current one, None for a gap."""
+        if self.num_pages <= (on_each_side + on_ends) * 2 + 1:
+            return list(self.page_range)
+        pages = []
+        if number > 1 + on_each_side + on_ends + 1:
+            pages.extend(range(1, on_ends + 1))
+            pages.append(None)
+            pages.extend(range(number - on_each_side, number + 1))
+        else:
+            pages.extend(range(1, number + 1))
+        if number < self.num_pages - on_each_side - on_ends - 1:
+            pages.extend(range(number + 1, number + on_each_side + 1))
+            pages.append(None)
+            pages.extend(
+                range(self.num_pages - on_ends + 1, self.num_pages + 1)
+            )
+        else:
+            pages.extend(range(number + 1, self.num_pages + 1))
+        return pages
+
+
+class EstimatedCountPaginator(CachedCountPaginator):
+    """Paginator of admin changelists that estimates large tables.
+
+    A whole table is counted from the statistics of ANALYZE, lists
+    narrowed by filters or search are counted as usual.
+    """
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_rows(
+                query.get_meta().db_table, self.object_list.db
+            )
+            if (estimate is not None
+                    and estimate >= settings.PAGINATOR_CACHED_COUNT_FROM):
+                return estimate
+        return super().count
+
+
+def encode_cursor(post):
+    """Return an opaque token pointing at the post."""
+    value = f'{post.created.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Return (created, pk) from the token, or None if it is broken."""
+    try:
+        value = base64.urlsafe_b64decode(
+            token + '=' * (-len(token) % 4)
+        ).decode()
+        created, pk = value.split('|')
+        created = parse_datetime(created)
+        pk = int(pk)
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+    if created is None:
+        return None
+    return created, pk
+
+
+class CursorPage:
+    """One page of the keyset paginated posts or comments."""
+    cursor = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self):
+        return (
+            f'<CursorPage after {self.previous_cursor} '
+            f'before {self.next_cursor}>'
+        )
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def cursor_paginator(request, post_list, per_page=None):
+    """Return posts after or before the cursor from the query string."""
+    per_page = per_page or settings.POSTS_NUM
+    after = decode_cursor(request.GET.get('after') or '')
+    before = None if after else decode_cursor(request.GET.get('before') or '')
+    if before:
+        created, pk = before
+        posts = list(
+            post_list.filter(
+                Q(created__gt=created) | Q(created=created, pk__gt=pk)
+            ).order_by('created', 'pk')[:per_page + 1]
+        )
+        has_more = len(posts) > per_page
+        posts = posts[:per_page][::-1]
+        has_next, has_previous = bool(posts), has_more
+    else:
+        post_list = post_list.order_by('-created', '-pk')
+        if after:
+            created, pk = after
+            post_list = post_list.filter(
+                Q(created__lt=created) | Q(created=created, pk__lt=pk)
+            )
+        posts = list(post_list[:per_page + 1])
+        has_more = len(posts) > per_page
+        posts = posts[:per_page]
+        has_next, has_previous = has_more, bool(after and posts)
+    return CursorPage(
+        posts,
+        encode_cursor(posts[-1]) if has_next else None,
+        encode_cursor(posts[0]) if has_previous else None
+    )
 
 
-def paginator(request, post_list):
+def paginator(request, post_list, cursor=None):
     """Return posts on the desired page."""
-    post = Paginator(post_list, settings.POSTS_NUM)
+    if cursor is None:
+        cursor = settings.POSTS_PAGINATION == 'cursor'
+    if cursor:
+        return cursor_paginator(request, post_list)
+    post = CachedCountPaginator(post_list, settings.POSTS_NUM)
     page_number = request.GET.get('page')
-    return post.get_page(page_number)
+    page = post.get_page(page_number)
+    page.elided_page_range = post.get_elided_page_range(page.number)
+    return page
@@ -1,32 +1,50 @@
+from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.db.models import Q
-from django.shortcuts import get_object_or_404, redirect, render
+from django.shortcuts import get_object_or_404, redirect
 
+from core.budgets import query_budget
+from core.caching import anonymous_cache_page, depend_on, generation_key
+from core.rendering import render
+from core.replicas import read_replica
+from core.sqlite import retry_locked
+
+from . import follows, timeline
+from .counters import get_stats
 from .forms import CommentForm, PostForm
 from .models import Comment, Follow, Group, Post, User
-from .utils import paginator
+from .search import highlight, search_posts
+from .shards import for_post, scatter
+from .utils import cursor_paginator, paginator
 
 
+@query_budget(5)
+@read_replica
 def search(request):
     """Search by text and author."""
     if request.method == 'GET':
-        query = request.GET.get('q')
-        post_list = Post.objects.filter(
-            Q(text__icontains=query) | Q(author__username__icontains=query)
+        query = request.GET.get('q', '').strip()
+        post_list = scatter(search_posts(query)).select_related(
+            'author', 'group'
         )
-        results = all((query, len(post_list) > 0))
-        page_obj = paginator(request, post_list)
+        page_obj = paginator(request, post_list, cursor=False)
+        for post in page_obj:
+            if getattr(post, 'snippet', None):
+                post.highlighted = highlight(post.snippet)
         context = {
             'query': query,
-            'results': results,
+            'results': len(page_obj) > 0,
             'page_obj': page_obj
         }
         return render(request, 'posts/search_results.html', context)
 
 
+@query_budget(6)
+@read_replica
+@anonymous_cache_page
 def index(request):
     """Return the main page."""
-    post_list = Post.objects.select_related('author', 'group')
+    depend_on(request, generation_key('feed'))
+    post_list = scatter(Post.objects.select_related('author', 'group'))
     page_obj = paginator(request, post_list)
     context = {
         'page_obj': page_obj,
@@ -34,10 +52,14 @@ def index(request):
     return render(request, 'posts/index.html', context)
 
 
+@query_budget(7)
+@read_replica
+@anonymous_cache_page
 def group_posts(request, slug):
     """Return the group page."""
+    depend_on(request, generation_key('feed'))
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.select_related('author')
+    post_list = scatter(group.posts.select_related('author'))
     page_obj = paginator(request, post_list)
     context = {
         'group': group,
@@ -46,16 +68,30 @@ def group_posts(request, slug):
     return render(request, 'posts/group_list.html', context)
 
 
+@query_budget(8)
+@read_replica
+@anonymous_cache_page
 def profile(request, username):
     """Return the profile page"""
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.select_related('author')
+    author = get_object_or_404(
+        User.objects.select_related('stats'),
+        username=username
+    )
+    # The cards count comments, which change the feed generation.
+    depend_on(
+        request,
+        generation_key('user', author.pk),
+        generation_key('groups'),
+        generation_key('feed')
+    )
+    post_list = author.posts.select_related('author', 'group')
     page_obj = paginator(request, post_list)
     user = request.user
-    following = (user.is_authenticated and
-                 Follow.objects.filter(user=user, author=author))
+    following = (user.is_authenticated
+                 and follows.is_following(user.pk, author.pk))
     context = {
         'author': author,
+        'stats': get_stats(author),
         'page_obj': page_obj,
         'following': following,
         'user': user,
@@ -63,24 +99,65 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+@query_budget(7)
+@read_replica
+@anonymous_cache_page
 def post_detail(request, post_id):
     """Return the post page."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        for_post(
+            Post.objects.select_related('author__stats', 'group'), post_id
+        ),
+        pk=post_id
+    )
+    depend_on(
+        request,
+        generation_key('post', post.pk),
+        generation_key('user', post.author_id),
+        generation_key('groups')
+    )
     user = request.user
     author = post.author
     form = CommentForm(request.POST or None)
-    comments = Comment.objects.filter(post_id=post_id)
+    comments = comments_page(request, post.pk)
     context = {
         'post': post,
         'user': user,
         'author': author,
+        'author_stats': get_stats(author),
         'form': form,
         'comments': comments
     }
     return render(request, 'posts/post_detail.html', context)
 
 
+def comments_page(request, post_id):
+    """Return a page of the post comments together with their authors."""
+    comments = for_post(Comment.objects, post_id).filter(
+        post_id=post_id
+    ).select_related('author')
+    return cursor_paginator(request, comments, settings.COMMENTS_NUM)
+
+
+@query_budget(5)
+@read_replica
+@anonymous_cache_page
+def comment_list(request, post_id):
+    """Return the next comments of the post as an HTML fragment."""
+    post = get_object_or_404(
+        for_post(Post.objects.only('pk'), post_id), pk=post_id
+    )
+    depend_on(request, generation_key('post', post.pk))
+    context = {
+        'post': post,
+        'comments': comments_page(request, post.pk),
+    }
+    return render(request, 'posts/includes/comments.html', context)
+
+
+@query_budget(12)
 @login_required
+@retry_locked
 def post_create(request):
     """Return the post creation page."""
     form = PostForm(
@@ -98,10 +175,12 @@ def post_create(request):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(9, duplicates=1)
 @login_required
+@retry_locked
 def post_edit(request, post_id):
     """Return the post edit page."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(for_post(Post.objects, post_id), pk=post_id)
     user = request.user
     if user != post.author:
         return redirect('posts:post_detail', post_id=post_id)
@@ -120,18 +199,22 @@ def post_edit(request, post_id):
     return render(request, 'posts/create_post.html', context)
 
 
+@query_budget(12, duplicates=1)
 @login_required
+@retry_locked
 def post_delete(request, post_id):
     """Post author deletes his post."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(for_post(Post.objects, post_id), pk=post_id)
     post.delete()
     return redirect('posts:profile', post.author)
 
 
+@query_budget(8)
 @login_required
+@retry_locked
 def add_comment(request, post_id):
     """Adding a comment."""
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(for_post(Post.objects, post_id), pk=post_id)
     form = CommentForm(request.POST or None)
     if form.is_valid():
         comment = form.save(commit=False)
@@ -141,19 +224,23 @@ def add_comment(request, post_id):
     return redirect('posts:post_detail', post_id=post_id)
 
 
+@query_budget(8)
 @login_required
+@retry_locked
 def comment_delete(request, post_id, comment_id):
     """Comment author deletes his comment."""
-    comment = get_object_or_404(Comment, id=comment_id)
+    comment = get_object_or_404(
+        for_post(Comment.objects, post_id), id=comment_id
+    )
     comment.delete()
     return redirect('posts:post_detail', comment.post.pk)
 
 
+@query_budget(7)
 @login_required
 def follow_index(request):
     """Return the subscription page."""
-    user = request.user
-    post_list = Post.objects.filter(author__following__user=user)
+    post_list = timeline.feed(request.user).select_related('author', 'group')
     page_obj = paginator(request, post_list)
     context = {
         'page_obj': page_obj,
@@ -161,7 +248,9 @@ def follow_index(request):
     return render(request, 'posts/follow.html', context)
 
 
+@query_budget(14)
 @login_required
+@retry_locked
 def profile_follow(request, username):
     """Following"""
     author = get_object_or_404(User, username=username)
@@ -171,20 +260,18 @@ def profile_follow(request, username):
             user=user,
             author=author
         )
+        # The cached set of this process may be older than the table.
+        follows.forget(user.pk)
     return redirect('posts:profile', username=username)
 
 
+@query_budget(12)
 @login_required
+@retry_locked
 def profile_unfollow(request, username):
     """Unfollowing"""
     author = get_object_or_404(User, username=username)
     user = request.user
-    try:
-        follow = Follow.objects.get(
-            author=author,
-            user=user
-        )
-    except Follow.DoesNotExist:
-        follow = None
-    follow.delete()
+    Follow.objects.filter(author=author, user=user).delete()
+    follows.forget(user.pk)
     return redirect('posts:profile', username=username)
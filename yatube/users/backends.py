@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+from django.db import transaction
+
+
+def user_key(user_id):
+    return f'users:user:{user_id}'
+
+
+def forget(user_id):
+    """Drop the cached user now and once the transaction commits."""
+    key = user_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedModelBackend(ModelBackend):
+    """Model backend that keeps the users of the sessions in the cache.
+
+    The session hash of a cached user is checked like that of a loaded
+    one, the entry is dropped whenever the user is saved or logs out.
+    """
+
+    def get_user(self, user_id):
+        key = user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TIMEOUT)
+        return user
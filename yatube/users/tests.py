@@ -1,7 +1,15 @@
 from http import HTTPStatus
+from io import StringIO
 
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.test import Client, TestCase
+from django.core import mail
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
 
 User = get_user_model()
 
@@ -46,3 +54,100 @@ class UserURLTests(TestCase):
             with self.subTest(template=template):
                 response = self.authorized_client.get(address)
                 self.assertTemplateUsed(response, template)
+
+
+@override_settings(
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['users.backends.CachedModelBackend'],
+)
+class CachedSessionTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(
+            username='NoName', password='Old-password-42'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def user_of(self, client):
+        return client.get(reverse('about:author')).wsgi_request.user
+
+    def test_warm_request_skips_database(self):
+        """A known session and its user come from the cache."""
+        self.user_of(self.client)
+        with CaptureQueriesContext(connection) as queries:
+            user = self.user_of(self.client)
+        self.assertEqual(user, self.user)
+        self.assertEqual([
+            query['sql'] for query in queries.captured_queries
+            if 'django_session' in query['sql']
+            or 'auth_user' in query['sql']
+        ], [])
+
+    def test_password_change_ends_other_sessions(self):
+        """Other sessions of the user end, the current one goes on."""
+        other = Client()
+        other.force_login(self.user)
+        self.user_of(other)
+        response = self.client.post(reverse('users:password_change'), {
+            'old_password': 'Old-password-42',
+            'new_password1': 'New-password-42',
+            'new_password2': 'New-password-42',
+        })
+        self.assertRedirects(response, reverse('users:password_change_done'))
+        self.assertTrue(self.user_of(self.client).is_authenticated)
+        self.assertFalse(self.user_of(other).is_authenticated)
+
+    def test_logout_ends_session(self):
+        """The session key is useless after the logout."""
+        self.user_of(self.client)
+        session_key = self.client.cookies[settings.SESSION_COOKIE_NAME].value
+        self.client.get(reverse('users:logout'))
+        other = Client()
+        other.cookies[settings.SESSION_COOKIE_NAME] = session_key
+        self.assertFalse(self.user_of(other).is_authenticated)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.mail.OutboxBackend',
+    OUTBOX_EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+)
+class OutboxMailTests(TestCase):
+    def setUp(self):
+        self.guest_client = Client()
+
+    def send_outbox(self):
+        call_command('send_outbox', once=True, stdout=StringIO())
+
+    def test_password_reset_mail_is_queued(self):
+        """The reset page answers at once, the worker sends the mail."""
+        User.objects.create_user(
+            username='NoName',
+            email='noname@example.com',
+            password='Old-password-42'
+        )
+        response = self.guest_client.post(
+            reverse('users:password_reset'), {'email': 'noname@example.com'}
+        )
+        self.assertRedirects(response, reverse('users:password_reset_done'))
+        self.assertEqual(mail.outbox, [])
+        self.send_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['noname@example.com'])
+
+    def test_signup_mail(self):
+        """A new user with an email gets a welcome mail."""
+        self.guest_client.post(reverse('users:signup'), {
+            'username': 'newbie',
+            'email': 'newbie@example.com',
+            'password1': 'Secret-password-42',
+            'password2': 'Secret-password-42',
+        })
+        self.assertTrue(User.objects.filter(username='newbie').exists())
+        self.send_outbox()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn('newbie', mail.outbox[0].body)
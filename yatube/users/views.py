@@ -1,3 +1,5 @@
+from django.core.mail import send_mail
+from django.template.loader import render_to_string
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 
@@ -9,3 +11,18 @@ class SignUp(CreateView):
     form_class = CreationForm
     success_url = reverse_lazy('posts:index')
     template_name = 'users/signup.html'
+
+    def form_valid(self, form):
+        response = super().form_valid(form)
+        user = self.object
+        if user.email:
+            context = {'user': user}
+            send_mail(
+                render_to_string(
+                    'users/signup_email_subject.txt', context
+                ).strip(),
+                render_to_string('users/signup_email.txt', context),
+                None,
+                [user.email]
+            )
+        return response
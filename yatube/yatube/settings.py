@@ -1,3 +1,4 @@
+import importlib.util
 import os
 
 
@@ -35,6 +36,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.budgets.QueryBudgetMiddleware',
+    'core.replicas.ReplicaMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -48,12 +51,26 @@ MIDDLEWARE = [
 ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+JINJA2_DIR = os.path.join(BASE_DIR, 'jinja2')
+# Templates are compiled once when the process starts and kept in memory.
+# Set TEMPLATES_RELOAD to compile a template again after its file changes.
+TEMPLATES_PRECOMPILE = True
+TEMPLATES_RELOAD = False
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
         'DIRS': [TEMPLATES_DIR],
-        'APP_DIRS': True,
         'OPTIONS': {
+            'loaders': [
+                (
+                    'core.template_loaders.Loader',
+                    [
+                        'django.template.loaders.filesystem.Loader',
+                        'django.template.loaders.app_directories.Loader',
+                    ],
+                    TEMPLATES_RELOAD,
+                ),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -64,6 +81,31 @@ TEMPLATES = [
         },
     },
 ]
+# The app directories loader is in the list wrapped by the cached loader.
+SILENCED_SYSTEM_CHECKS = ['debug_toolbar.W006']
+# Jinja2 versions of the post pages are kept in JINJA2_DIR. Views listed
+# here by name, e.g. {'posts:index': 'jinja2'}, render with that engine,
+# the rest and all views without the jinja2 package use Django templates.
+TEMPLATE_ENGINES = {}
+if importlib.util.find_spec('jinja2'):
+    TEMPLATES.append({
+        'BACKEND': 'django.template.backends.jinja2.Jinja2',
+        'DIRS': [JINJA2_DIR],
+        'OPTIONS': {
+            'environment': 'posts.jinja.environment',
+            'auto_reload': TEMPLATES_RELOAD,
+            'context_processors': [
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    })
+# Pages of the views listed here by name, e.g. {'posts:index'}, are sent
+# while they are rendered: the head and header at once, the parts of the
+# templates in {% streamed %} in chunks of STREAM_CHUNK_SIZE characters.
+STREAMING_VIEWS = set()
+STREAM_CHUNK_SIZE = 4096
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
 
@@ -73,6 +115,55 @@ DATABASES = {
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
+# Set on every SQLite connection. In WAL mode readers are not blocked by
+# writers, busy_timeout makes a writer wait that many milliseconds for the
+# lock. A negative cache_size is in KiB.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'cache_size': -64000,
+    'mmap_size': 256 * 1024 * 1024,
+    'temp_store': 'memory',
+}
+# Write views that still find the database locked are run again up to
+# SQLITE_WRITE_RETRIES times, after a random pause of up to
+# SQLITE_RETRY_DELAY seconds doubled on every attempt.
+SQLITE_WRITE_RETRIES = 3
+SQLITE_RETRY_DELAY = 0.05
+# The optimize_database command runs PRAGMA optimize this often.
+SQLITE_OPTIMIZE_INTERVAL = 60 * 60
+# backup_database keeps SQLITE_BACKUP_KEEP copies in SQLITE_BACKUP_DIR.
+# A database in WAL mode is copied in one step, which does not block
+# writers; other ones SQLITE_BACKUP_PAGES pages at a time.
+SQLITE_BACKUP_DIR = os.path.join(BASE_DIR, 'backups')
+SQLITE_BACKUP_KEEP = 7
+SQLITE_BACKUP_PAGES = 256
+
+DATABASE_ROUTERS = [
+    'posts.shards.ShardRouter',
+    'core.replicas.ReplicaRouter',
+]
+# Reads of the views marked with read_replica go to one of these aliases
+# of DATABASES that is at most REPLICA_MAX_LAG seconds behind the primary.
+# The lag comes from the heartbeat written by the heartbeat command, or by
+# copy_replica for SQLite copies, and is checked again after
+# REPLICA_LAG_CHECK_INTERVAL seconds. Replicas are never migrated.
+DATABASE_REPLICAS = []
+REPLICA_MAX_LAG = 5
+REPLICA_LAG_CHECK_INTERVAL = 1
+# After a write the user reads from the primary for this many seconds.
+REPLICA_PIN_SECONDS = 10
+REPLICA_PIN_COOKIE = 'primary'
+
+# Posts and comments are kept in these aliases of DATABASES, picked by
+# the author. Every shard is migrated and gets copies of the users and
+# groups, see the sync_shards command. Posts on shards are read from the
+# shards, not from replicas. Authors are spread by the length of the
+# list and post ids carry the position of their shard, so the list must
+# not change once there are posts. It holds up to POST_SHARD_SLOTS.
+POST_SHARDS = []
+POST_SHARD_SLOTS = 64
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -101,22 +192,124 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+# collectstatic stores assets under content-hashed names listed in a
+# manifest, with gzip and brotli copies next to them.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+# Serve STATIC_ROOT from the WSGI application when no web server stands in
+# front of it. Hashed assets are cached by browsers for STATIC_MAX_AGE.
+STATIC_SERVE = False
+STATIC_MAX_AGE = 60 * 60 * 24 * 365
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# Only files under these directories of MEDIA_ROOT are served.
+MEDIA_PUBLIC_DIRS = ('posts/', 'cache/')
+MEDIA_MAX_AGE = 60 * 60 * 24 * 7
+# Who sends media files: None streams them from Django, with sendfile
+# where the WSGI server supports it; 'x-accel-redirect' hands them to
+# nginx through the internal location MEDIA_ACCEL_PREFIX aliased to
+# MEDIA_ROOT; 'x-sendfile' hands them to Apache or lighttpd.
+MEDIA_ACCEL = None
+MEDIA_ACCEL_PREFIX = '/protected-media/'
 
 POSTS_NUM = 10
+COMMENTS_NUM = 20
+
+# 'offset' for numbered pages, 'cursor' for keyset pagination.
+POSTS_PAGINATION = 'offset'
+# Totals of at least this many posts are cached and may be slightly stale.
+PAGINATOR_CACHED_COUNT_FROM = 10000
+PAGINATOR_COUNT_TIMEOUT = 300
+
+# Memcached shared by all processes, e.g. 127.0.0.1:11211. Without it
+# every process keeps its own cache and knows nothing of what the other
+# processes dropped from theirs.
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION', '')
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.MemcachedCache',
+            'LOCATION': MEMCACHED_LOCATION.split(','),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Pages of anonymous users are cached until the data they show changes.
+# Only the shared cache lets every process see the generations bumped by
+# the others, a cache of one process keeps pages a few seconds instead.
+PAGE_CACHE_TIMEOUT = 60 * 60 if MEMCACHED_LOCATION else 5
+# How long a request may render a missed page before others stop waiting.
+PAGE_CACHE_LOCK_TIMEOUT = 30
+# How many 50 ms intervals other requests wait for that page.
+PAGE_CACHE_LOCK_WAIT = 20
+
+# Authors with at least this many followers are not fanned out on write,
+# their posts are merged into the follow feed at read time instead.
+TIMELINE_FANOUT_LIMIT = 1000
+# How many recent posts of an author are copied to a new follower's feed.
+TIMELINE_BACKFILL = 100
+# Maximum number of entries kept in a single user's feed.
+TIMELINE_LENGTH = 1000
+# Followed authors of a user and the popular authors are cached this long.
+# A change forgets them only in the cache it can reach, so a cache of one
+# process keeps them a few seconds.
+FOLLOW_CACHE_TIMEOUT = 60 * 60 * 24 if MEMCACHED_LOCATION else 5
+
+# With the shared cache sessions are read from it and written through to
+# the database, the users of the sessions are kept in it too. Both are
+# dropped on logout and password change, which a cache of one process
+# would only do for that process, so without it the defaults are used.
+if MEMCACHED_LOCATION:
+    SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+    AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+USER_CACHE_TIMEOUT = 60 * 60
 
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'posts:index'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+# Requests put their mail into the outbox table, the send_outbox command
+# sends it in batches through OUTBOX_EMAIL_BACKEND.
+EMAIL_BACKEND = 'core.mail.OutboxBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+OUTBOX_BATCH_SIZE = 50
+# A failed email is retried after OUTBOX_RETRY_DELAY seconds, the delay
+# doubles up to OUTBOX_RETRY_MAX_DELAY. After OUTBOX_MAX_ATTEMPTS the
+# email stays in the outbox with its last error.
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_RETRY_MAX_DELAY = 60 * 60
+OUTBOX_MAX_ATTEMPTS = 8
+# Emails taken by a worker that stopped are sent again after this long.
+OUTBOX_LEASE = 5 * 60
 
-CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+# Uploaded images are shrunk to fit IMAGE_MAX_SIZE and re-encoded without
+# metadata, small clean images are stored as they are.
+IMAGE_MAX_SIZE = (1920, 1920)
+IMAGE_MAX_PIXELS = 50_000_000
+IMAGE_PASSTHROUGH_BYTES = 200 * 1024
+IMAGE_FORMAT = 'WEBP'
+IMAGE_QUALITY = 82
+FILE_UPLOAD_MAX_MEMORY_SIZE = 2 * 1024 * 1024
 
-CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
-}
+# Processes rendering thumbnails of uploaded images, 0 renders them in
+# the request right after the post is saved. Tests always use 0, see
+# core.runner and core.testing.
+THUMBNAIL_WORKERS = 2
+TEST_RUNNER = 'core.runner.TestRunner'
+
+# Raise instead of logging when a view runs over its query budget.
+QUERY_BUDGET_STRICT = False
+# Lookups of sorl thumbnails happen once per image until the post card is
+# cached and are warmed up by THUMBNAIL_WORKERS, the lag of replicas is
+# read at most every REPLICA_LAG_CHECK_INTERVAL, so they are not counted.
+QUERY_BUDGET_IGNORED_TABLES = ('thumbnail_kvstore', 'core_heartbeat')
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
@@ -1,7 +1,18 @@
 import os
 
+from django.conf import settings
 from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+if settings.TEMPLATES_PRECOMPILE:
+    from core.template_loaders import precompile
+
+    precompile()
+
+if settings.STATIC_SERVE:
+    from core.static import StaticFilesApplication
+
+    application = StaticFilesApplication(application)